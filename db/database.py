@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -37,3 +38,20 @@ def get_db():
     finally:
         db.close()
 
+
+def bulk_upsert(db, model, rows, update_columns, chunk_size=1000):
+    """
+    INSERT ... ON DUPLICATE KEY UPDATE for a list of row dicts.
+    Uses the table's unique constraint to decide insert vs update.
+    """
+    if not rows:
+        return 0
+
+    written = 0
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        stmt = mysql_insert(model.__table__).values(chunk)
+        stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+        db.execute(stmt)
+        written += len(chunk)
+    return written
@@ -10,7 +10,7 @@ import uvicorn
 import traceback
 import logging
 from pydantic import BaseModel, EmailStr
-from db.database import get_db, Base, engine
+from db.database import get_db, Base, engine, SessionLocal
 from model.user_model import UserTable
 from schema.user_schema import UserCreate, UserResponse
 from utils import token_utils as utils
@@ -25,6 +25,9 @@ from router.stocks_router_for_UI import router as stocks_router_for_UI
 from router.index_router_for_UI import router as index_router_for_UI
 from router.insights_router import router as insights_router
 from router.gainer_looser_router import router as gainer_looser_router
+from service.trend_retention import check_trend_schema
+from service.search_index import stock_search
+from service.screener_engine import screener_snapshot
 
 
 
@@ -70,6 +73,20 @@ app = FastAPI(
 def create_tables():
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created successfully")
+    try:
+        check_trend_schema()
+    except Exception as e:
+        logger.error(f"Could not check trend snapshot tables: {e}")
+    # build the stock search index up front so the first keystroke doesn't pay for it
+    db = SessionLocal()
+    try:
+        stock_search.get(db)
+    except Exception as e:
+        logger.error(f"Could not build stock search index: {e}")
+    finally:
+        db.close()
+    # first screener snapshot loads price histories; keep that off the first request
+    screener_snapshot.warm()
 
 
 # CORS middleware configuration
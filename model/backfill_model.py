@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.database import Base
+
+
+class BackfillCheckpoint(Base):
+    """Per-symbol progress of the historical backfill"""
+    __tablename__ = "backfill_checkpoints"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    symbol = Column(String(20), index=True)
+    completed_through = Column(Date)  # every day up to this one has been fetched
+    last_bar_date = Column(Date)  # latest bar actually stored
+    status = Column(String(20))  # done, empty
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
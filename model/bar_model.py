@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, Float, Date, BigInteger, ForeignKey, String, UniqueConstraint
+from db.database import Base
+
+
+class MonthlyBar(Base):
+    """Materialized monthly OHLC rollup of daily_data"""
+    __tablename__ = "monthly_bars"
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), index=True)
+    symbol = Column(String(20), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+    start_date = Column(Date)
+    end_date = Column(Date)
+
+    __table_args__ = (
+        UniqueConstraint("symbol", "year", "month"),
+    )
+
+
+class YearlyBar(Base):
+    """Materialized yearly OHLC rollup of daily_data"""
+    __tablename__ = "yearly_bars"
+
+    id = Column(Integer, primary_key=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), index=True)
+    symbol = Column(String(20), nullable=False)
+    year = Column(Integer, nullable=False)
+
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
+    volume = Column(BigInteger)
+
+    start_date = Column(Date)
+    end_date = Column(Date)
+
+    __table_args__ = (
+        UniqueConstraint("symbol", "year"),
+    )
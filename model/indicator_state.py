@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from db.database import Base
+
+
+class IndicatorState(Base):
+    """Running state of one indicator for one symbol, advanced bar by bar"""
+    __tablename__ = "indicator_state"
+
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False, index=True)
+    indicator = Column(String(20), nullable=False)  # SMA, EMA, RSI, MACD, BOLLINGER
+    params = Column(String(20), nullable=False)  # e.g. "20" or "12,26,9"
+
+    last_date = Column(Date)  # last bar folded into the state
+    state = Column(JSON)  # running EMA values, window buffers, ...
+    history = Column(JSON)  # last N output points, oldest first
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("symbol", "indicator", "params"),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from db.database import Base
+
+
+class LatestQuote(Base):
+    """Latest close and summary stats per stock, kept current by the bar ingestion hook"""
+    __tablename__ = "latest_quote"
+
+    stock_id = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    symbol = Column(String(20), unique=True, index=True)
+    last_date = Column(Date)
+    last_close = Column(Float)
+    prev_close = Column(Float)
+    change = Column(Float)
+    change_percent = Column(Float)
+    high_52w = Column(Float)
+    low_52w = Column(Float)
+    avg_volume_20 = Column(Float)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, JSON, UniqueConstraint
 from sqlalchemy.sql import func
 from db.database import Base
 
 class TrendAnalysis(Base):
-    """Store trend analysis results"""
+    """Store trend analysis results, one snapshot per symbol per trading day"""
     __tablename__ = "trend_analysis"
+    __table_args__ = (
+        UniqueConstraint("symbol", "snapshot_date", name="uq_trend_analysis_symbol_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
+    snapshot_date = Column(Date, nullable=False)  # trading day of the last bar analysed
     trend = Column(String(20), nullable=False)  # uptrend, downtrend, sideways
     signal = Column(String(10), nullable=False)  # buy, sell, hold
     strength = Column(Float)
@@ -20,11 +24,15 @@ class TrendAnalysis(Base):
 
 
 class SupportResistance(Base):
-    """Store support and resistance levels"""
+    """Store support and resistance levels, one snapshot per symbol per trading day"""
     __tablename__ = "support_resistance"
+    __table_args__ = (
+        UniqueConstraint("symbol", "snapshot_date", name="uq_support_resistance_symbol_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
+    snapshot_date = Column(Date, nullable=False)  # trading day of the last bar analysed
     current_price = Column(Float)
     support_levels = Column(JSON)  # Array of support prices
     resistance_levels = Column(JSON)  # Array of resistance prices
@@ -37,8 +45,11 @@ class SupportResistance(Base):
 
 
 class CandlestickPattern(Base):
-    """Store detected candlestick patterns"""
+    """Store detected candlestick patterns, one row per symbol, candle and pattern"""
     __tablename__ = "candlestick_patterns"
+    __table_args__ = (
+        UniqueConstraint("symbol", "pattern_date", "pattern", name="uq_candlestick_patterns_symbol_date_pattern"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -5,8 +5,10 @@ from service.analysis_service import (
     get_monthly_summary,
     get_yearly_summary,
     get_period_summary,
+    get_period_summaries,
     parse_date
 )
+from schema.analysis_schema import PeriodRange
 
 router = APIRouter()
 
@@ -26,3 +28,19 @@ def custom_period(symbol: str, start_date: str, end_date: str, db: Session = Dep
     start_date = parse_date(start_date)
     end_date = parse_date(end_date)
     return get_period_summary(db, symbol, start_date, end_date)
+
+
+@router.post("/analysis/period/batch")
+def custom_period_batch(ranges: list[PeriodRange], db: Session = Depends(get_db)):
+    """
+    Summaries for many symbols / date ranges in one call
+    Example:
+    [
+        {"symbol": "TCS.NS", "start_date": "2024-01-01", "end_date": "2024-03-31"},
+        {"symbol": "INFY.NS", "start_date": "01-01-2024", "end_date": "31-12-2024"}
+    ]
+    """
+    return get_period_summaries(db, [
+        (r.symbol, parse_date(r.start_date), parse_date(r.end_date))
+        for r in ranges
+    ])
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from typing import Optional
 from db.database import get_db
 from service.comparison_service import (
     compare_stocks,
     compare_indicators,
     compare_performance
 )
+from utils.response_format import negotiate_format, columnar_response, records_to_columns
+
+
+def _table_response(request, format, result):
+    """{symbol: {field: value}} as-is, or one row per symbol when a columnar format is negotiated"""
+    fmt = negotiate_format(request, format)
+    if fmt == "json":
+        return result
+    rows = [{"symbol": sym, **values} for sym, values in result.items()]
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    return columnar_response(records_to_columns(rows, fields), fmt)
 
 router = APIRouter()
 
@@ -13,11 +25,16 @@ router = APIRouter()
 # 1️⃣ Compare multiple stock prices
 # ---------------------------------------------------------
 @router.post("/stocks")
-def api_compare_stocks(symbols: list[str], db: Session = Depends(get_db)):
+def api_compare_stocks(
+    request: Request,
+    symbols: list[str],
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     if len(symbols) < 2 or len(symbols) > 5:
         raise HTTPException(400, "Provide between 2 and 5 symbols")
 
-    return compare_stocks(db, symbols)
+    return _table_response(request, format, compare_stocks(db, symbols))
 
 
 # ---------------------------------------------------------
@@ -35,8 +52,13 @@ def api_compare_indicators(symbols: list[str], db: Session = Depends(get_db)):
 # 3️⃣ Performance comparison
 # ---------------------------------------------------------
 @router.post("/performance")
-def api_compare_performance(symbols: list[str], db: Session = Depends(get_db)):
+def api_compare_performance(
+    request: Request,
+    symbols: list[str],
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     if len(symbols) < 2 or len(symbols) > 5:
         raise HTTPException(400, "Provide between 2 and 5 symbols")
 
-    return compare_performance(db, symbols)
+    return _table_response(request, format, compare_performance(db, symbols))
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from db.database import get_db
-from model.index import IndexStock, Index
-from model.stock import Stock
+from service.index_graph import index_graph
+from service.search_index import stock_search
 
 from schema.index_schema_UI import IndexBase
 from datetime import datetime, timedelta
@@ -16,8 +16,17 @@ router = APIRouter(prefix="/indices",)
 # -----------------------------------------
 @router.get("/list", response_model=list[str])
 def list_indices(db: Session = Depends(get_db)):
-    result = db.query(Index.name).distinct().all()
-    return [row[0] for row in result]
+    return index_graph.index_names(db)
+
+# -----------------------------------------
+# 3️⃣ SEARCH INSIDE AN INDEX
+# /indices/search?index=NIFTY50&q=INF
+# -----------------------------------------
+@router.get("/search", response_model=list[IndexBase])
+def search_index(index: str, q: str, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    members = index_graph.member_ids(db, index)
+    result = stock_search.search(db, q, limit, within=members)
+    return [IndexBase(stock_symbol=symbol, stock_name=name) for symbol, name in result]
 
 # -----------------------------------------
 # 2️⃣ GET STOCKS UNDER A GIVEN INDEX
@@ -25,31 +34,6 @@ def list_indices(db: Session = Depends(get_db)):
 # -----------------------------------------
 @router.get("/{index_name}", response_model=list[IndexBase])
 def index_stocks(index_name: str, db: Session = Depends(get_db)):
-    # join IndexStock -> Index -> Stock
-    result = (
-        db.query(Stock.symbol.label("stock_symbol"), Stock.name.label("stock_name"))
-        .join(IndexStock, IndexStock.stock_id == Stock.id)
-        .join(Index, IndexStock.index_id == Index.id)
-        .filter(Index.name == index_name)
-        .all()
-    )
-    # convert to IndexBase objects
-    return [IndexBase(stock_symbol=r.stock_symbol, stock_name=r.stock_name) for r in result]
+    # membership comes from the cached index graph, not a per-request join
+    return [IndexBase(stock_symbol=symbol, stock_name=name) for symbol, name in index_graph.members(db, index_name)]
 
-# -----------------------------------------
-# 3️⃣ SEARCH INSIDE AN INDEX
-# /indices/search?index=NIFTY50&q=INF
-# -----------------------------------------
-@router.get("/search", response_model=list[IndexBase])
-def search_index(index: str, q: str, db: Session = Depends(get_db)):
-    result = (
-        db.query(Stock.symbol.label("stock_symbol"), Stock.name.label("stock_name"))
-        .join(IndexStock, IndexStock.stock_id == Stock.id)
-        .join(Index, IndexStock.index_id == Index.id)
-        .filter(
-            Index.name == index,
-            Stock.symbol.ilike(f"%{q}%")   # ilike for case-insensitive search
-        )
-        .all()
-    )
-    return [IndexBase(stock_symbol=r.stock_symbol, stock_name=r.stock_name) for r in result]
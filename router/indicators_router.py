@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
+from typing import Optional
 from db.database import get_db
-from service.analysis_service import (
-    get_price_dataframe,
-    calculate_sma,
-    calculate_ema,
-    calculate_rsi,
-    calculate_macd,
-    calculate_bollinger,
-    calculate_all_indicators,
-)
+from service.indicator_state_service import get_indicator_points, latest_indicators
+from service.batch_indicator_service import index_indicators
+from utils.response_format import negotiate_format, columnar_response, records_to_columns
+
+
+def _series_response(request, format, symbol, points):
+    """Plain list of points, or columnar / msgpack / arrow when negotiated"""
+    fmt = negotiate_format(request, format)
+    if fmt == "json":
+        return points
+    return columnar_response(records_to_columns(points), fmt, meta={"symbol": symbol})
 
 
 router = APIRouter()
@@ -17,44 +20,62 @@ router = APIRouter()
 # SMA
 # ---------------------------------------------
 @router.get("/sma/{symbol}")
-def get_sma(symbol: str, period: int = 20, db: Session = Depends(get_db)):
-    df = get_price_dataframe(db, symbol)
-    if df is None:
+def get_sma(
+    request: Request,
+    symbol: str,
+    period: int = Query(20, ge=1, le=200),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    points = get_indicator_points(db, symbol, "SMA", period)
+    if points is None:
         raise HTTPException(404, "No data found")
-    return calculate_sma(df, period).to_dict(orient="records")
+    return _series_response(request, format, symbol, points)
 
 
 # ---------------------------------------------
 # EMA
 # ---------------------------------------------
 @router.get("/ema/{symbol}")
-def get_ema(symbol: str, period: int = 20, db: Session = Depends(get_db)):
-    df = get_price_dataframe(db, symbol)
-    if df is None:
+def get_ema(
+    request: Request,
+    symbol: str,
+    period: int = Query(20, ge=1, le=200),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    points = get_indicator_points(db, symbol, "EMA", period)
+    if points is None:
         raise HTTPException(404, "No data found")
-    return calculate_ema(df, period).to_dict(orient="records")
+    return _series_response(request, format, symbol, points)
 
 
 # ---------------------------------------------
 # RSI
 # ---------------------------------------------
 @router.get("/rsi/{symbol}")
-def get_rsi(symbol: str, period: int = 14, db: Session = Depends(get_db)):
-    df = get_price_dataframe(db, symbol)
-    if df is None:
+def get_rsi(
+    request: Request,
+    symbol: str,
+    period: int = Query(14, ge=1, le=200),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    points = get_indicator_points(db, symbol, "RSI", period)
+    if points is None:
         raise HTTPException(404, "No data found")
-    return calculate_rsi(df, period).to_dict(orient="records")
+    return _series_response(request, format, symbol, points)
 
 
 # ---------------------------------------------
 # MACD
 # ---------------------------------------------
 @router.get("/macd/{symbol}")
-def get_macd(symbol: str, db: Session = Depends(get_db)):
-    df = get_price_dataframe(db, symbol)  # MACD needs more data
-    if df is None:
+def get_macd(request: Request, symbol: str, format: Optional[str] = None, db: Session = Depends(get_db)):
+    points = get_indicator_points(db, symbol, "MACD")
+    if points is None:
         raise HTTPException(404, "No data found")
-    return calculate_macd(df).to_dict(orient="records")
+    return _series_response(request, format, symbol, points)
 
 
 # ---------------------------------------------
@@ -62,22 +83,20 @@ def get_macd(symbol: str, db: Session = Depends(get_db)):
 # ---------------------------------------------
 @router.get("/bollinger/{symbol}")
 def get_bollinger(
+    request: Request,
     symbol: str,
-    period: int = 20,   # IMPORTANT
+    period: int = Query(20, ge=2, le=200),   # IMPORTANT
+    format: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    df = get_price_dataframe(db, symbol)
-    if df is None or df.empty:
+    points = get_indicator_points(db, symbol, "BOLLINGER", period)
+    if not points:
         return []
 
-    # calculate bollinger with given period
-    df['middle'] = df['close'].rolling(period).mean()
-    df['std'] = df['close'].rolling(period).std()
-    df['upper'] = df['middle'] + (2 * df['std'])
-    df['lower'] = df['middle'] - (2 * df['std'])
-
-    result = df[['date', 'upper', 'middle', 'lower']].dropna()
-    return result.to_dict(orient="records")
+    return _series_response(request, format, symbol, [
+        {"date": p["date"], "upper": p["Upper"], "middle": p["Middle"], "lower": p["Lower"]}
+        for p in points
+    ])
 
 
 
@@ -87,7 +106,19 @@ def get_bollinger(
 # ---------------------------------------------
 @router.get("/all/{symbol}")
 def get_all_indicators(symbol: str, db: Session = Depends(get_db)):
-    df = get_price_dataframe(db, symbol, limit=300)
-    if df is None:
+    result = latest_indicators(db, symbol)
+    if result is None:
         raise HTTPException(404, "No data found")
-    return calculate_all_indicators(df)
+    return result
+
+
+# ---------------------------------------------
+# ALL Indicators for every stock of an index
+# /indicators/index/NIFTY 50
+# ---------------------------------------------
+@router.get("/indicators/index/{index_name}")
+def get_index_indicators(index_name: str, db: Session = Depends(get_db)):
+    result = index_indicators(db, index_name)
+    if result is None:
+        raise HTTPException(404, "No data found for index")
+    return result
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
 from sqlalchemy.orm import Session
-from model.intraday_model import IntradayData
+from typing import Optional
 from schema.live_stock_schema import StockPriceResponse
 from service.live_stock_service import get_live_yf_price, _persist_intraday_batch  # updated
+from service.quote_cache import quote_cache
+from service.intraday_buffer import intraday_buffer
 from db.database import get_db
-import yfinance as yf
-from datetime import datetime
+from utils.response_format import negotiate_format, columnar_response, records_to_columns
 
 router = APIRouter()
 
@@ -18,56 +19,50 @@ def live_stock_price(symbol: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/stocks/quote-cache/stats")
+def quote_cache_stats():
+    """Hit / miss / coalesced counters of the live quote cache"""
+    return quote_cache.stats()
+
+
 @router.get("/stocks/intraday/{symbol}")
-def intraday_series(symbol: str, background_tasks: BackgroundTasks):
+def intraday_series(
+    request: Request,
+    symbol: str,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = None,
+):
     """Return today's 1m intraday OHLCV for the symbol.
-    Does not persist to DB; used for live 1D chart.
+    Served from the in-memory intraday buffer; only new bars are fetched
+    upstream and persisted in the background.
     """
+    fmt = negotiate_format(request, format)
     try:
         sym = symbol.upper()
-        ticker = yf.Ticker(sym)
-        df = ticker.history(period="1d", interval="1m")
-        if df is None or df.empty:
-            return []
+        bars, changed = intraday_buffer.refresh(sym)
 
-        out = []
-        rows_to_save = []
-        for idx, row in df.iterrows():
-            # idx is pandas Timestamp
-            ts = idx.to_pydatetime()
-            data_dict = {
-                "symbol": sym,
-                "date": ts.isoformat(),
-                "open": float(row.get("Open", 0.0)),
-                "high": float(row.get("High", 0.0)),
-                "low": float(row.get("Low", 0.0)),
-                "close": float(row.get("Close", 0.0)),
-                "volume": float(row.get("Volume", 0.0)),
-            }
-            out.append(data_dict)
+        if changed:
+            background_tasks.add_task(_persist_intraday_batch, sym, changed)
 
-            rows_to_save.append({
-                "timestamp": ts,
-                "open": float(row.get("Open", 0.0)),
-                "high": float(row.get("High", 0.0)),
-                "low": float(row.get("Low", 0.0)),
-                "close": float(row.get("Close", 0.0)),
-                "volume": float(row.get("Volume", 0.0)),
-            })
+        if fmt != "json":
+            columns = records_to_columns(bars, ["timestamp", "open", "high", "low", "close", "volume"])
+            columns["date"] = [ts.isoformat() for ts in columns.pop("timestamp")]
+            return columnar_response(columns, fmt, meta={"symbol": sym})
 
-            # DB me save 
-            intraday_record = IntradayData(
-                symbol=sym,
-                timestamp=ts,
-                open=data_dict["open"],
-                high=data_dict["high"],
-                low=data_dict["low"],
-                close=data_dict["close"],
-                volume=data_dict["volume"]
-            )
+        return [
+            {
+                "symbol": sym,
+                "date": bar["timestamp"].isoformat(),
+                "open": bar["open"],
+                "high": bar["high"],
+                "low": bar["low"],
+                "close": bar["close"],
+                "volume": bar["volume"],
+            }
+            for bar in bars
+        ]
 
-        background_tasks.add_task(_persist_intraday_batch, sym, rows_to_save)
-        return out
-    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch intraday for {symbol}: {e}")
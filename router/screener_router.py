@@ -1,9 +1,13 @@
 # router/nifty_router.py
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from db.database import get_db
-from service.screener_service import filter_stocks, advanced_filter, filter_by_sector, save_screener, list_screeners
-from schema.stock_schema import ScreenerFilter, ScreenerAdvanced
+from service.screener_service import (
+    filter_stocks, advanced_filter, filter_by_sector, query_screener, screener_fields,
+    save_screener, list_screeners, open_screener, delete_screener
+)
+from service.screener_engine import ScreenerQueryError
+from schema.stock_schema import ScreenerAdvanced, ScreenerQuery, ScreenerSave
 
 router = APIRouter()
 
@@ -25,10 +29,35 @@ def screener_advanced(filter: ScreenerAdvanced, db: Session = Depends(get_db)):
 def screener_sector(sector: str, db: Session = Depends(get_db)):
     return filter_by_sector(db, sector)
 
+# Filter DSL: {"where": {"all": [{"field": "pe_ratio", "op": "lt", "value": 20},
+#                               {"any": [...]}]},
+#             "sort_by": "market_cap", "order": "desc", "limit": 20}
+@router.post("/screener/query")
+def screener_query(query: ScreenerQuery, db: Session = Depends(get_db)):
+    try:
+        return query_screener(db, query)
+    except ScreenerQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/screener/fields")
+def screener_field_list(db: Session = Depends(get_db)):
+    return screener_fields(db)
+
 @router.post("/screener/save")
-def screener_save(filter: ScreenerFilter, db: Session = Depends(get_db)):
-    return save_screener(db, filter)
+def screener_save(data: ScreenerSave, db: Session = Depends(get_db)):
+    return save_screener(db, data)
 
 @router.get("/screener/list")
 def screener_list(db: Session = Depends(get_db)):
     return list_screeners(db)
+
+@router.get("/screener/saved/{screener_id}")
+def screener_open(screener_id: int, db: Session = Depends(get_db)):
+    try:
+        return open_screener(db, screener_id)
+    except ScreenerQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/screener/saved/{screener_id}")
+def screener_delete(screener_id: int, db: Session = Depends(get_db)):
+    return delete_screener(db, screener_id)
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
-from db.database import get_db
+from typing import Optional
+import json
+from db.database import get_db, SessionLocal
 from model.stock import Stock
 from model.daily_data import DailyData
 from schema.stock_schema_UI import StockBase, PopularStockResponse
+from service.price_store import price_store
+from service.popular_service import popular_volume
+from service.search_index import stock_search
+from utils.response_format import negotiate_format, columnar_response
 
 router = APIRouter(prefix="/stocks")
 
+# Rows fetched per server-side cursor round trip / emitted per chunk
+STREAM_CHUNK_ROWS = 500
+
 
 # -----------------------------------------
 # 1️⃣ LIST ALL STOCKS
@@ -24,13 +34,10 @@ def list_stocks(db: Session = Depends(get_db)):
 # /stocks/search?q=TAT
 # -----------------------------------------
 @router.get("/search", response_model=list[StockBase])
-def search_stocks(q: str, db: Session = Depends(get_db)):
-    result = db.query(Stock).filter(
-        (Stock.symbol.like(f"%{q}%")) |
-        (Stock.name.like(f"%{q}%"))
-    ).all()
-
-    return result
+def search_stocks(q: str, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    # in-memory prefix/trigram index, rebuilt when the stocks table changes
+    result = stock_search.search(db, q, limit)
+    return [{"symbol": symbol, "name": name} for symbol, name in result]
 
 
 # -----------------------------------------
@@ -38,25 +45,58 @@ def search_stocks(q: str, db: Session = Depends(get_db)):
 # -----------------------------------------
 @router.get("/popular", response_model=list[PopularStockResponse])
 def popular_stocks(limit: int = 20, db: Session = Depends(get_db)):
-    from datetime import datetime, timedelta
-    last_30 = datetime.now().date() - timedelta(days=30)
-
-    result = (
-        db.query(DailyData.symbol, func.sum(DailyData.volume).label("volume"))
-        .filter(DailyData.date >= last_30)
-        .group_by(DailyData.symbol)
-        .order_by(func.sum(DailyData.volume).desc())
-        .limit(limit)
-        .all()
-    )
-    return [{"symbol": r[0], "volume": float(r[1])} for r in result]
+    # 30-day volume totals are maintained incrementally in popular_service
+    result = popular_volume.top(db, limit)
+    return [{"symbol": symbol, "volume": volume} for symbol, volume in result]
 
 
 
 # HISTORICAL DATA FOR A SYMBOL
+# ?stream=ndjson -> one JSON object per line
+# ?stream=json   -> chunked JSON array
+# ?format=columnar|msgpack|arrow (or Accept header) -> one array per field
 @router.get("/historical/{symbol}")
-def historical_data(symbol: str, days: int = 1825, db: Session = Depends(get_db)):
+def historical_data(
+    request: Request,
+    symbol: str,
+    days: int = 1825,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     cutoff = datetime.now().date() - timedelta(days=days)
+    fmt = negotiate_format(request, format)
+
+    if fmt != "json" and not stream:
+        series = price_store.get(db, symbol)
+        bars = series.since(cutoff) if series is not None else None
+        if bars is None or len(bars) == 0:
+            raise HTTPException(status_code=404, detail="No data found for symbol")
+        return columnar_response(
+            {
+                "date": bars.date,
+                "open": bars.open,
+                "high": bars.high,
+                "low": bars.low,
+                "close": bars.close,
+                "volume": bars.volume,
+            },
+            fmt,
+            meta={"symbol": symbol},
+        )
+
+    if stream:
+        exists = (
+            db.query(DailyData.id)
+            .filter(DailyData.symbol == symbol, DailyData.date >= cutoff)
+            .first()
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="No data found for symbol")
+
+        media_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+        return StreamingResponse(_stream_historical(symbol, cutoff, stream == "ndjson"), media_type=media_type)
+
     rows = (
         db.query(DailyData)
         .filter(DailyData.symbol == symbol, DailyData.date >= cutoff)
@@ -78,4 +118,56 @@ def historical_data(symbol: str, days: int = 1825, db: Session = Depends(get_db)
             "volume": float(r.volume),
         }
         for r in rows
-    ]
\ No newline at end of file
+    ]
+
+
+def _stream_historical(symbol: str, cutoff, ndjson: bool):
+    """
+    Yield rows as they come off a server-side cursor, STREAM_CHUNK_ROWS at a time.
+    Uses its own session: the request session is closed before streaming ends.
+    """
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                DailyData.symbol,
+                DailyData.date,
+                DailyData.open,
+                DailyData.high,
+                DailyData.low,
+                DailyData.close,
+                DailyData.volume,
+            )
+            .filter(DailyData.symbol == symbol, DailyData.date >= cutoff)
+            .order_by(DailyData.date.asc())
+            .yield_per(STREAM_CHUNK_ROWS)
+        )
+
+        separator = "\n" if ndjson else ","
+        chunk = []
+        first = True
+        if not ndjson:
+            yield "["
+
+        for r in rows:
+            chunk.append(json.dumps({
+                "symbol": r.symbol,
+                "date": r.date.isoformat(),
+                "open": float(r.open),
+                "high": float(r.high),
+                "low": float(r.low),
+                "close": float(r.close),
+                "volume": float(r.volume),
+            }))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield ("" if first or ndjson else separator) + separator.join(chunk) + ("\n" if ndjson else "")
+                first = False
+                chunk = []
+
+        if chunk:
+            yield ("" if first or ndjson else separator) + separator.join(chunk) + ("\n" if ndjson else "")
+
+        if not ndjson:
+            yield "]"
+    finally:
+        db.close()
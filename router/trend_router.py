@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from db.database import get_db
 from service.trend_service import (
@@ -12,6 +12,8 @@ from service.trend_service import (
     save_candlestick_patterns,
     get_pattern_history
 )
+from service.support_resistance_service import index_support_resistance
+from service.candlestick_service import PATTERN_NAMES, scan_patterns
 from schema.trend_schema import (
     TrendAnalysisResponse,
     SupportResistanceResponse,
@@ -32,11 +34,11 @@ async def get_trend(symbol: str, db: Session = Depends(get_db), save_to_db: bool
     - **symbol**: Stock symbol (e.g., AAPL, RELIANCE.NS)
     - **save_to_db**: Save analysis to database (default: True)
     """
-    df = get_stock_data(symbol.upper(), period="3mo")
+    df = get_stock_data(symbol.upper(), period="3mo", db=db)
     trend_data = calculate_trend(df)
     
     if save_to_db:
-        save_trend_analysis(db, symbol.upper(), trend_data)
+        save_trend_analysis(db, symbol.upper(), trend_data, df.index[-1].date())
     
     return {
         "symbol": symbol.upper(),
@@ -73,19 +75,47 @@ async def get_trend_analysis_history(symbol: str, limit: int = 10, db: Session =
     }
 
 
+@router.get("/support-resistance/index/{index_name}")
+async def get_index_support_resistance(
+    index_name: str,
+    windows: list[int] = Query([10]),
+    db: Session = Depends(get_db),
+):
+    """
+    Support and resistance levels for every stock of an index
+    
+    - **index_name**: Index name (e.g., NIFTY 50)
+    - **windows**: Pivot half-widths in bars (repeatable, default: 10)
+    """
+    if any(w < 1 or w > 100 for w in windows):
+        raise HTTPException(status_code=400, detail="windows must be between 1 and 100")
+    result = index_support_resistance(db, index_name, windows)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No data found for index")
+    return result
+
+
 @router.get("/support-resistance/{symbol}", response_model=SupportResistanceResponse)
-async def get_support_resistance(symbol: str, db: Session = Depends(get_db), save_to_db: bool = True):
+async def get_support_resistance(
+    symbol: str,
+    db: Session = Depends(get_db),
+    save_to_db: bool = True,
+    windows: list[int] = Query([10]),
+):
     """
     Key support and resistance levels
     
     - **symbol**: Stock symbol
     - **save_to_db**: Save levels to database (default: True)
+    - **windows**: Pivot half-widths in bars (repeatable, default: 10)
     """
-    df = get_stock_data(symbol.upper(), period="6mo")
-    levels_data = find_support_resistance_levels(df)
+    if any(w < 1 or w > 100 for w in windows):
+        raise HTTPException(status_code=400, detail="windows must be between 1 and 100")
+    df = get_stock_data(symbol.upper(), period="6mo", db=db)
+    levels_data = find_support_resistance_levels(df, windows)
     
     if save_to_db:
-        save_support_resistance(db, symbol.upper(), levels_data)
+        save_support_resistance(db, symbol.upper(), levels_data, df.index[-1].date())
     
     return {
         "symbol": symbol.upper(),
@@ -94,16 +124,51 @@ async def get_support_resistance(symbol: str, db: Session = Depends(get_db), sav
     }
 
 
+@router.get("/candlestick/scan")
+async def scan_candlestick_patterns(
+    pattern: list[str] = Query(None),
+    index: str = None,
+    days: int = Query(1, ge=1, le=30),
+    db: Session = Depends(get_db),
+):
+    """
+    Stocks that printed a pattern recently, e.g. which stocks printed a hammer today
+    
+    - **pattern**: Pattern name(s) (repeatable, default: all)
+    - **index**: Limit the scan to one index (default: every stock)
+    - **days**: Number of latest sessions to report (default: 1)
+    """
+    if pattern:
+        unknown = [p for p in pattern if p not in PATTERN_NAMES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown pattern(s): {unknown}. Available: {PATTERN_NAMES}")
+
+    result = scan_patterns(db, index, pattern, days)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No data found")
+    return result
+
+
 @router.get("/candlestick/{symbol}", response_model=CandlestickPatternsResponse)
-async def get_candlestick_patterns(symbol: str, db: Session = Depends(get_db), save_to_db: bool = True):
+async def get_candlestick_patterns(
+    symbol: str,
+    db: Session = Depends(get_db),
+    save_to_db: bool = True,
+    full_history: bool = False,
+):
     """
-    Candlestick patterns (Doji, Hammer, etc.)
+    Candlestick patterns (Doji, Hammer, Morning Star, etc.)
     
     - **symbol**: Stock symbol
     - **save_to_db**: Save patterns to database (default: True)
+    - **full_history**: Scan the last 5 years instead of the last 5 sessions (default: False)
     """
-    df = get_stock_data(symbol.upper(), period="1mo")
-    patterns_data = detect_candlestick_patterns(df)
+    if full_history:
+        df = get_stock_data(symbol.upper(), period="5y", db=db)
+        patterns_data = detect_candlestick_patterns(df, days=None)
+    else:
+        df = get_stock_data(symbol.upper(), period="1mo", db=db)
+        patterns_data = detect_candlestick_patterns(df)
     
     if save_to_db:
         save_candlestick_patterns(db, symbol.upper(), patterns_data)
@@ -5,6 +5,7 @@ from pydantic import EmailStr
 
 from db.database import get_db
 from schema.watchlist_schema import WatchlistCreate, WatchlistUpdate, WatchlistListsResponse,WatchlistDetailsResponse
+from schema.watchlist_schema import WatchlistQuotesResponse, UserWatchlistQuotesResponse
 from service.watchlist_service import WatchlistService
 
 router = APIRouter(
@@ -39,6 +40,16 @@ def get_watchlist(watchlist_id: int, db: Session = Depends(get_db)):
     """Get a specific watchlist by ID"""
     return WatchlistService.get_watchlist_by_id(watchlist_id, db)
 
+@router.get("/quotes/{email}", response_model=UserWatchlistQuotesResponse)
+def get_user_watchlist_quotes(email: EmailStr, db: Session = Depends(get_db)):
+    """Quotes for every symbol across a user's watchlists, in one batched lookup"""
+    return WatchlistService.get_user_watchlist_quotes(email, db)
+
+@router.get("/{watchlist_id}/quotes", response_model=WatchlistQuotesResponse)
+def get_watchlist_quotes(watchlist_id: int, db: Session = Depends(get_db)):
+    """Quotes for every symbol in a watchlist, in one batched lookup"""
+    return WatchlistService.get_watchlist_quotes(watchlist_id, db)
+
 @router.put("/{watchlist_id}", response_model=WatchlistDetailsResponse)
 def update_watchlist(watchlist_id: int, watchlist: WatchlistUpdate, db: Session = Depends(get_db)):
     """
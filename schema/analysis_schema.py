@@ -22,3 +22,9 @@ class RangeData(BaseModel):
     low: float
     close: float
     volume: int
+
+
+class PeriodRange(BaseModel):
+    symbol: str
+    start_date: str
+    end_date: str
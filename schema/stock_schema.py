@@ -1,5 +1,6 @@
 # schema/nifty_schema.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, List, Optional, Union
 
 class ScreenerFilter(BaseModel):
     min_price: float
@@ -14,3 +15,32 @@ class ScreenerAdvanced(BaseModel):
     max_pb: float
     min_mcap: float
     max_mcap: float
+
+
+class ScreenerCondition(BaseModel):
+    """field <op> value; `between` takes [low, high], `in`/`not_in` take a list"""
+    model_config = ConfigDict(extra="forbid")
+    field: str
+    op: str = Field(..., pattern="^(gt|gte|lt|lte|eq|ne|between|in|not_in)$")
+    value: Any = None
+
+
+class ScreenerExpression(BaseModel):
+    """`all` = AND, `any` = OR; items are conditions or nested expressions"""
+    # a misspelled condition must not parse as an empty (match-all) expression
+    model_config = ConfigDict(extra="forbid")
+    all: Optional[List[Union["ScreenerExpression", ScreenerCondition]]] = None
+    any: Optional[List[Union["ScreenerExpression", ScreenerCondition]]] = None
+
+
+class ScreenerQuery(BaseModel):
+    where: Optional[Union[ScreenerExpression, ScreenerCondition]] = None
+    sort_by: Optional[str] = None
+    order: str = Field("desc", pattern="^(asc|desc)$")
+    limit: Optional[int] = Field(None, ge=1, le=5000)
+
+
+class ScreenerSave(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    query: ScreenerQuery
@@ -32,6 +32,13 @@ class TrendAnalysisResponse(BaseModel):
     data: TrendDataResponse
 
 
+class LevelZone(BaseModel):
+    """Cluster of nearby pivots"""
+    price: float
+    touches: int
+    volume: int
+
+
 class SupportResistanceData(BaseModel):
     """Support and resistance data response"""
     current_price: float
@@ -41,6 +48,9 @@ class SupportResistanceData(BaseModel):
     nearest_resistance: Optional[float]
     distance_to_support_percent: Optional[float]
     distance_to_resistance_percent: Optional[float]
+    support_zones: List[LevelZone] = []
+    resistance_zones: List[LevelZone] = []
+    windows: List[int] = []
     analysis_date: str
     
     class Config:
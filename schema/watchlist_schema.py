@@ -26,3 +26,32 @@ class WatchlistDetailsResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class WatchlistQuote(BaseModel):
+    symbol: str
+    price: Optional[float] = None
+    previousClose: Optional[float] = None
+    change: Optional[float] = None
+    changePercent: Optional[float] = None
+    volume: Optional[int] = None
+    timestamp: Optional[str] = None
+    source: str  # "live", "eod" (last stored close) or "none"
+
+
+class WatchlistQuotesResponse(BaseModel):
+    id: int
+    watchlist_name: str
+    quotes: List[WatchlistQuote]
+
+
+class WatchlistSymbols(BaseModel):
+    id: int
+    watchlist_name: str
+    symbol: List[str]
+
+
+class UserWatchlistQuotesResponse(BaseModel):
+    email: str
+    watchlists: List[WatchlistSymbols]
+    quotes: List[WatchlistQuote]  # one per distinct symbol across all watchlists
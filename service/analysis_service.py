@@ -1,5 +1,12 @@
 from sqlalchemy import extract, func, and_
 from model.daily_data import DailyData
+from model.bar_model import MonthlyBar, YearlyBar
+from service.rollup_service import refresh_rollups
+from service.price_store import price_store
+from service.range_query import get_range_index
+from service.batch_indicator_service import (
+    compute_indicator_matrix, latest_values, format_indicator_snapshot
+)
 from datetime import datetime
 import pandas as pd
 import numpy as np
@@ -10,130 +17,92 @@ import ta
 # 1. MONTHLY ANALYSIS (Open / Close / High / Low)
 # ---------------------------------------------------------
 def get_monthly_summary(db, symbol):
-    grouped = (
-        db.query(
-            extract('year', DailyData.date).label("year"),
-            extract('month', DailyData.date).label("month"),
-            func.min(DailyData.low).label("low"),
-            func.max(DailyData.high).label("high"),
-            func.min(DailyData.date).label("start_date"),
-            func.max(DailyData.date).label("end_date")
-        )
-        .filter(DailyData.symbol == symbol)
-        .group_by(extract('year', DailyData.date), extract('month', DailyData.date))
-        .order_by("year", "month")
+    bars = _read_monthly_bars(db, symbol)
+
+    # First request for a symbol builds its rollups once
+    if not bars and refresh_rollups(db, symbol):
+        db.commit()
+        bars = _read_monthly_bars(db, symbol)
+
+    return [
+        {
+            "year": b.year,
+            "month": b.month,
+            "open": b.open,
+            "close": b.close,
+            "high": b.high,
+            "low": b.low,
+        }
+        for b in bars
+    ]
+
+
+def _read_monthly_bars(db, symbol):
+    return (
+        db.query(MonthlyBar)
+        .filter(MonthlyBar.symbol == symbol)
+        .order_by(MonthlyBar.year, MonthlyBar.month)
         .all()
     )
 
-    result = []
-
-    for row in grouped:
-        # OPEN = price on first trading day of month
-        open_price = db.query(DailyData.open).filter(
-            DailyData.symbol == symbol,
-            DailyData.date == row.start_date
-        ).scalar()
-
-        # CLOSE = price on last trading day of month
-        close_price = db.query(DailyData.close).filter(
-            DailyData.symbol == symbol,
-            DailyData.date == row.end_date
-        ).scalar()
-
-        result.append({
-            "year": int(row.year),
-            "month": int(row.month),
-            "open": float(open_price) if open_price else None,
-            "close": float(close_price) if close_price else None,
-            "high": float(row.high),
-            "low": float(row.low),
-        })
-
-    return result
-
 
 # ---------------------------------------------------------
 # 2. YEARLY ANALYSIS (Open / Close / High / Low)
 # ---------------------------------------------------------
 def get_yearly_summary(db, symbol):
-    grouped = (
-        db.query(
-            extract('year', DailyData.date).label("year"),
-            func.min(DailyData.low).label("low"),
-            func.max(DailyData.high).label("high"),
-            func.min(DailyData.date).label("start_date"),
-            func.max(DailyData.date).label("end_date"),
-        )
-        .filter(DailyData.symbol == symbol)
-        .group_by(extract('year', DailyData.date))
-        .order_by("year")
+    bars = _read_yearly_bars(db, symbol)
+
+    if not bars and refresh_rollups(db, symbol):
+        db.commit()
+        bars = _read_yearly_bars(db, symbol)
+
+    return [
+        {
+            "year": b.year,
+            "open": b.open,
+            "close": b.close,
+            "high": b.high,
+            "low": b.low,
+        }
+        for b in bars
+    ]
+
+
+def _read_yearly_bars(db, symbol):
+    return (
+        db.query(YearlyBar)
+        .filter(YearlyBar.symbol == symbol)
+        .order_by(YearlyBar.year)
         .all()
     )
 
-    result = []
-
-    for row in grouped:
-        open_price = db.query(DailyData.open).filter(
-            DailyData.symbol == symbol,
-            DailyData.date == row.start_date
-        ).scalar()
-
-        close_price = db.query(DailyData.close).filter(
-            DailyData.symbol == symbol,
-            DailyData.date == row.end_date
-        ).scalar()
-
-        result.append({
-            "year": int(row.year),
-            "open": float(open_price) if open_price else None,
-            "close": float(close_price) if close_price else None,
-            "high": float(row.high),
-            "low": float(row.low)
-        })
-
-    return result
-
 
 # ---------------------------------------------------------
 # 3. CUSTOM DATE RANGE ANALYSIS
 # ---------------------------------------------------------
 def get_period_summary(db, symbol, start_date, end_date):
-    data = (
-        db.query(
-            func.min(DailyData.low).label("low"),
-            func.max(DailyData.high).label("high"),
-            func.min(DailyData.date).label("start_date"),
-            func.max(DailyData.date).label("end_date")
-        )
-        .filter(
-            DailyData.symbol == symbol,
-            DailyData.date >= start_date,
-            DailyData.date <= end_date
-        )
-        .first()
-    )
-
-    if not data.start_date:
+    series = price_store.get(db, symbol)
+    if series is None:
         return None  # No trading data
 
-    open_price = db.query(DailyData.open).filter(
-        DailyData.symbol == symbol,
-        DailyData.date == data.start_date
-    ).scalar()
-
-    close_price = db.query(DailyData.close).filter(
-        DailyData.symbol == symbol,
-        DailyData.date == data.end_date
-    ).scalar()
-
-    return {
-        "start_date": str(data.start_date),
-        "end_date": str(data.end_date),
-        "open": float(open_price) if open_price else None,
-        "close": float(close_price) if close_price else None,
-        "high": float(data.high),
-        "low": float(data.low)
-    }
+    return get_range_index(series).summary(start_date, end_date)
+
+
+def get_period_summaries(db, ranges):
+    """
+    Batch form of get_period_summary.
+    `ranges` is a list of (symbol, start_date, end_date); all symbols are
+    loaded together and each range is answered in constant time.
+    """
+    series = price_store.get_many(db, list({r[0] for r in ranges}))
+
+    result = []
+    for symbol, start_date, end_date in ranges:
+        summary = None
+        if symbol in series:
+            summary = get_range_index(series[symbol]).summary(start_date, end_date)
+        result.append({"symbol": symbol, "summary": summary})
+    return result
 
 from datetime import datetime
 
@@ -151,29 +120,7 @@ def get_price_dataframe(db: Session, symbol: str, limit: int = 200):
     Fetch latest 'limit' candles for the symbol.
     Oldest first (required for indicators).
     """
-    rows = (
-        db.query(DailyData)
-        .filter(DailyData.symbol == symbol)
-        .order_by(DailyData.date.desc())
-        .limit(limit)
-        .all()
-    )
-
-    if not rows:
-        return None
-
-    rows.reverse()
-
-    df = pd.DataFrame([{
-        "date": r.date,
-        "open": r.open,
-        "high": r.high,
-        "low": r.low,
-        "close": r.close,
-        "volume": r.volume,
-    } for r in rows])
-
-    return df
+    return price_store.frame(db, symbol, limit)
 
 
 # ---------------------------------------------
@@ -244,10 +191,6 @@ def calculate_all_indicators(df: pd.DataFrame):
     """
     Returns SMA, EMA, RSI, MACD, Bollinger in a single response.
     """
-    return {
-        "SMA_20": calculate_sma(df.copy(), 20).tail(1).to_dict(orient="records")[0],
-        "EMA_20": calculate_ema(df.copy(), 20).tail(1).to_dict(orient="records")[0],
-        "RSI_14": calculate_rsi(df.copy(), 14).tail(1).to_dict(orient="records")[0],
-        "MACD": calculate_macd(df.copy()).tail(1).to_dict(orient="records")[0],
-        "Bollinger": calculate_bollinger(df.copy(), 20).tail(1).to_dict(orient="records")[0],
-    }
\ No newline at end of file
+    close = pd.DataFrame({"close": df["close"].to_numpy()}, index=pd.to_datetime(df["date"]))
+    latest = latest_values(compute_indicator_matrix(close))
+    return format_indicator_snapshot(latest["close"])
@@ -0,0 +1,106 @@
+# service/bar_ingest.py
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from sqlalchemy.orm import Session
+from db.database import bulk_upsert
+from model.daily_data import DailyData
+from service.rollup_service import refresh_rollups
+from service.price_store import price_store
+from service.indicator_state_service import advance_indicator_states
+from service.market_movers_service import invalidate_movers
+from service.latest_quote_service import refresh_latest_quotes
+from service.popular_service import popular_volume
+from service.screener_engine import screener_snapshot
+
+DAILY_UPDATE_COLUMNS = ["symbol", "open", "high", "low", "close", "adj_close", "volume"]
+DAILY_FIELDS = ["stock_id", "symbol", "date", "open", "high", "low", "close", "adj_close", "volume", "timeframe"]
+
+
+# ---------------------------------------------------------
+# Download many tickers in one request
+# ---------------------------------------------------------
+def download_batch(symbols: list, **kwargs):
+    """
+    yf.download for several tickers at once.
+    Returns {symbol: OHLCV DataFrame}; tickers with no rows are left out.
+    """
+    kwargs.setdefault("threads", True)
+    df = yf.download(
+        symbols,
+        group_by="ticker",
+        auto_adjust=False,
+        progress=False,
+        **kwargs,
+    )
+    if df is None or df.empty:
+        return {}
+
+    frames = {}
+    if isinstance(df.columns, pd.MultiIndex):
+        tickers = set(df.columns.get_level_values(0))
+        for sym in symbols:
+            if sym in tickers:
+                frame = df[sym].dropna(how="all")
+                if not frame.empty:
+                    frames[sym] = frame
+    elif len(symbols) == 1:
+        frames[symbols[0]] = df.dropna(how="all")
+    return frames
+
+
+# ---------------------------------------------------------
+# DataFrame -> daily_data rows without iterrows()
+# ---------------------------------------------------------
+def _column(values):
+    """float array -> list with NaN as None"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def frame_to_rows(frame: pd.DataFrame, stock_id: int, symbol: str, timeframe: str = "1D"):
+    # partial bars (any of OHLC missing) are skipped; readers assume all four are set
+    frame = frame.dropna(subset=["Open", "High", "Low", "Close"])
+    if frame.empty:
+        return []
+
+    close = frame["Close"].to_numpy(dtype=float)
+    adj_close = frame["Adj Close"].to_numpy(dtype=float) if "Adj Close" in frame.columns else close
+    n = len(frame)
+
+    columns = (
+        [stock_id] * n,
+        [symbol] * n,
+        pd.DatetimeIndex(frame.index).date.tolist(),
+        frame["Open"].to_numpy(dtype=float).tolist(),
+        frame["High"].to_numpy(dtype=float).tolist(),
+        frame["Low"].to_numpy(dtype=float).tolist(),
+        close.tolist(),
+        _column(adj_close),
+        np.nan_to_num(frame["Volume"].to_numpy(dtype=float)).astype(np.int64).tolist(),
+        [timeframe] * n,
+    )
+    return [dict(zip(DAILY_FIELDS, values)) for values in zip(*columns)]
+
+
+def upsert_daily_rows(db: Session, rows: list):
+    """Bulk INSERT ... ON DUPLICATE KEY UPDATE on (stock_id, date, timeframe)"""
+    return bulk_upsert(db, DailyData, rows, DAILY_UPDATE_COLUMNS)
+
+
+# ---------------------------------------------------------
+# Keep derived data in step with daily_data
+# ---------------------------------------------------------
+def on_bars_written(db: Session, written: dict):
+    """
+    Refresh everything derived from daily_data after bars were written.
+    `written` maps symbol -> earliest date written.
+    """
+    for symbol, since in written.items():
+        refresh_rollups(db, symbol, since=since)
+        price_store.invalidate(symbol)
+        advance_indicator_states(db, symbol)
+    refresh_latest_quotes(db, list(written))
+    db.commit()
+    popular_volume.on_bars_written(db, written)
+    invalidate_movers()
+    screener_snapshot.invalidate()
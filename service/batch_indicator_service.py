@@ -0,0 +1,175 @@
+# service/batch_indicator_service.py
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from service.index_graph import index_graph
+from service.price_store import price_store
+
+INDICATOR_KEYS = ["SMA_20", "EMA_20", "RSI_14", "MACD", "Signal", "Histogram", "Upper", "Middle", "Lower"]
+
+
+# ---------------------------------------------------------
+# Constituents of an index
+# ---------------------------------------------------------
+def get_index_symbols(db: Session, index_name: str):
+    return index_graph.symbols(db, index_name)
+
+
+# ---------------------------------------------------------
+# bars x symbols matrices from the PriceStore
+# ---------------------------------------------------------
+def _stack(series: dict, limit: int, field: str):
+    """
+    Last `limit` values of `field` per symbol, stacked by bar position:
+    the bottom row is every symbol's own latest bar. Shorter histories
+    are padded at the top (NaN / NaT).
+    """
+    depth = max(min(len(s), limit) for s in series.values())
+    if field == "date":
+        out = np.full((depth, len(series)), np.datetime64("NaT"), dtype="datetime64[D]")
+    else:
+        out = np.full((depth, len(series)), np.nan)
+    for col, s in enumerate(series.values()):
+        values = getattr(s, field)[-limit:]
+        out[depth - len(values):, col] = values
+    return out
+
+
+def _ordered_series(db: Session, symbols: list):
+    series = price_store.get_many(db, symbols)
+    return {symbol: series[symbol] for symbol in dict.fromkeys(symbols) if symbol in series}
+
+
+def build_price_matrix(db: Session, symbols: list, limit: int = 300, field: str = "close"):
+    """
+    The last `limit` bars of every symbol, one column per symbol, stacked
+    by position rather than aligned on dates. Rolling windows, ewm and diff
+    then always run over a symbol's own consecutive bars, even when it
+    missed sessions that other symbols traded. Bar dates are in
+    build_date_matrix() with the same layout.
+    """
+    series = _ordered_series(db, symbols)
+    if not series:
+        return None
+    return pd.DataFrame(_stack(series, limit, field), columns=list(series))
+
+
+def build_date_matrix(db: Session, symbols: list, limit: int = 300):
+    """datetime64[D] array of bar dates matching build_price_matrix (NaT padding)"""
+    series = _ordered_series(db, symbols)
+    if not series:
+        return None
+    return _stack(series, limit, "date")
+
+
+# ---------------------------------------------------------
+# All indicators for every column in one pass
+# ---------------------------------------------------------
+def compute_indicator_matrix(close: pd.DataFrame):
+    """
+    SMA/EMA 20, RSI 14, MACD 12-26-9 and Bollinger 20 over every column.
+    Same formulas as the calculate_* helpers in analysis_service.
+    """
+    sma = close.rolling(20).mean()
+    std = close.rolling(20).std()
+    ema = close.ewm(span=20, adjust=False).mean()
+
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).rolling(14).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(14).mean()
+    rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    return {
+        "close": close,
+        "SMA_20": sma,
+        "EMA_20": ema,
+        "RSI_14": rsi,
+        "MACD": macd,
+        "Signal": signal,
+        "Histogram": macd - signal,
+        "Upper": sma + std * 2,
+        "Middle": sma,
+        "Lower": sma - std * 2,
+    }
+
+
+def latest_values(matrix: dict, dates: np.ndarray = None):
+    """
+    Last non-NaN value (and its date) of every indicator for every column.
+    `dates` is the build_date_matrix() array; without it the frame's
+    DatetimeIndex is used. Returns {symbol: {key: (date, value)}}.
+    """
+    close = matrix["close"]
+    if dates is None:
+        dates = np.repeat(close.index.values.astype("datetime64[D]")[:, None], close.shape[1], axis=1)
+    symbols = list(close.columns)
+    result = {symbol: {} for symbol in symbols}
+
+    for key, frame in matrix.items():
+        values = frame.to_numpy()
+        valid = ~np.isnan(values)
+        # position of the last valid row per column
+        last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+        has_value = valid.any(axis=0)
+        picked = values[last, np.arange(values.shape[1])]
+
+        for col, symbol in enumerate(symbols):
+            if has_value[col]:
+                result[symbol][key] = (str(dates[last[col], col]), float(picked[col]))
+
+    return result
+
+
+def _point(values, date_key, **fields):
+    """Build a {date, ...} record like calculate_*(...).tail(1), or None."""
+    if date_key not in values:
+        return None
+    point = {"date": values[date_key][0]}
+    for name, key in fields.items():
+        point[name] = values[key][1] if key in values else None
+    return point
+
+
+def format_indicator_snapshot(values: dict):
+    """Per-symbol output in the calculate_all_indicators shape"""
+    return {
+        "SMA_20": _point(values, "SMA_20", close="close", SMA="SMA_20"),
+        "EMA_20": _point(values, "EMA_20", close="close", EMA="EMA_20"),
+        "RSI_14": _point(values, "RSI_14", close="close", RSI="RSI_14"),
+        "MACD": _point(values, "MACD", MACD="MACD", Signal="Signal", Histogram="Histogram"),
+        "Bollinger": _point(values, "Upper", close="close", Upper="Upper", Middle="Middle", Lower="Lower"),
+    }
+
+
+# ---------------------------------------------------------
+# Whole-index technicals
+# ---------------------------------------------------------
+def index_indicators(db: Session, index_name: str, limit: int = 300):
+    """Latest indicators for every constituent of an index, or None"""
+    symbols = get_index_symbols(db, index_name)
+    close = build_price_matrix(db, symbols, limit) if symbols else None
+    if close is None:
+        return None
+
+    dates = build_date_matrix(db, symbols, limit)
+    latest = latest_values(compute_indicator_matrix(close), dates)
+
+    data = []
+    for symbol in symbols:
+        values = latest.get(symbol)
+        if not values or "close" not in values:
+            continue
+        row = {"symbol": symbol, "date": values["close"][0]}
+        for key in ["close"] + INDICATOR_KEYS:
+            row[key] = values[key][1] if key in values else None
+        data.append(row)
+
+    return {
+        "index": index_name,
+        "as_of": str(dates[-1].max()),
+        "count": len(data),
+        "data": data,
+    }
@@ -0,0 +1,250 @@
+# service/candlestick_service.py
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from model.stock import Stock
+from service.batch_indicator_service import get_index_symbols, build_price_matrix, build_date_matrix
+
+
+# ---------------------------------------------------------
+# Candle geometry over whole OHLC arrays (1-D, or dates x symbols)
+# ---------------------------------------------------------
+def _shift(values: np.ndarray, k: int):
+    """values moved down k rows; the first k rows become NaN"""
+    out = np.full(values.shape, np.nan)
+    if k < len(values):
+        out[k:] = values[:len(values) - k]
+    return out
+
+
+class Candles:
+    def __init__(self, open, high, low, close):
+        self.open = np.asarray(open, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.close = np.asarray(close, dtype=float)
+
+        self.body = np.abs(self.close - self.open)
+        self.range = self.high - self.low
+        self.upper = self.high - np.maximum(self.open, self.close)
+        self.lower = np.minimum(self.open, self.close) - self.low
+        self.bullish = self.close > self.open
+        self.bearish = self.close < self.open
+
+    def prev(self, name: str, k: int = 1):
+        """Attribute of the candle k bars back"""
+        return _shift(getattr(self, name).astype(float), k)
+
+
+# ---------------------------------------------------------
+# Pattern masks
+# ---------------------------------------------------------
+def _doji(c):
+    return c.body < c.range * 0.1
+
+
+def _hammer(c):
+    return (c.lower > c.body * 2) & (c.upper < c.body * 0.5) & c.bullish
+
+
+def _hanging_man(c):
+    return (c.lower > c.body * 2) & (c.upper < c.body * 0.5) & c.bearish
+
+
+def _shooting_star(c):
+    return (c.upper > c.body * 2) & (c.lower < c.body * 0.5)
+
+
+def _bullish_engulfing(c):
+    return (c.prev("bearish") == 1) & c.bullish & (c.body > c.prev("body") * 1.5)
+
+
+def _bearish_engulfing(c):
+    return (c.prev("bullish") == 1) & c.bearish & (c.body > c.prev("body") * 1.5)
+
+
+def _bullish_harami(c):
+    prev_open, prev_close = c.prev("open"), c.prev("close")
+    return ((c.prev("bearish") == 1) & c.bullish
+            & (c.open >= prev_close) & (c.close <= prev_open) & (c.body < c.prev("body")))
+
+
+def _bearish_harami(c):
+    prev_open, prev_close = c.prev("open"), c.prev("close")
+    return ((c.prev("bullish") == 1) & c.bearish
+            & (c.open <= prev_close) & (c.close >= prev_open) & (c.body < c.prev("body")))
+
+
+def _morning_star(c):
+    first_body = c.prev("body", 2)
+    first_mid = (c.prev("open", 2) + c.prev("close", 2)) / 2
+    return ((c.prev("bearish", 2) == 1) & (first_body > c.prev("range", 2) * 0.5)
+            & (c.prev("body") < first_body * 0.3)
+            & c.bullish & (c.close > first_mid))
+
+
+def _evening_star(c):
+    first_body = c.prev("body", 2)
+    first_mid = (c.prev("open", 2) + c.prev("close", 2)) / 2
+    return ((c.prev("bullish", 2) == 1) & (first_body > c.prev("range", 2) * 0.5)
+            & (c.prev("body") < first_body * 0.3)
+            & c.bearish & (c.close < first_mid))
+
+
+def _three_white_soldiers(c):
+    return ((c.prev("bullish", 2) == 1) & (c.prev("bullish") == 1) & c.bullish
+            & (c.prev("close") > c.prev("close", 2)) & (c.close > c.prev("close"))
+            & (c.prev("open") > c.prev("open", 2)) & (c.open > c.prev("open")))
+
+
+def _three_black_crows(c):
+    return ((c.prev("bearish", 2) == 1) & (c.prev("bearish") == 1) & c.bearish
+            & (c.prev("close") < c.prev("close", 2)) & (c.close < c.prev("close"))
+            & (c.prev("open") < c.prev("open", 2)) & (c.open < c.prev("open")))
+
+
+# Order matters: within a group only the first matching pattern is kept
+# for a candle (the single-candle shapes were an if/elif chain).
+PATTERNS = [
+    {"name": "Doji", "type": "neutral", "confidence": 75, "candles": 1, "group": "shape",
+     "description": "Market indecision", "mask": _doji},
+    {"name": "Hammer", "type": "bullish", "confidence": 80, "candles": 1, "group": "shape",
+     "description": "Bullish reversal signal", "mask": _hammer},
+    {"name": "Hanging Man", "type": "bearish", "confidence": 75, "candles": 1, "group": "shape",
+     "description": "Potential bearish reversal", "mask": _hanging_man},
+    {"name": "Shooting Star", "type": "bearish", "confidence": 80, "candles": 1, "group": "shape",
+     "description": "Strong bearish signal", "mask": _shooting_star},
+    {"name": "Bullish Engulfing", "type": "bullish", "confidence": 85, "candles": 2, "group": None,
+     "description": "Strong bullish reversal", "mask": _bullish_engulfing},
+    {"name": "Bearish Engulfing", "type": "bearish", "confidence": 85, "candles": 2, "group": None,
+     "description": "Strong bearish reversal", "mask": _bearish_engulfing},
+    {"name": "Bullish Harami", "type": "bullish", "confidence": 70, "candles": 2, "group": None,
+     "description": "Selling pressure fading", "mask": _bullish_harami},
+    {"name": "Bearish Harami", "type": "bearish", "confidence": 70, "candles": 2, "group": None,
+     "description": "Buying pressure fading", "mask": _bearish_harami},
+    {"name": "Morning Star", "type": "bullish", "confidence": 85, "candles": 3, "group": None,
+     "description": "Three-candle bullish reversal", "mask": _morning_star},
+    {"name": "Evening Star", "type": "bearish", "confidence": 85, "candles": 3, "group": None,
+     "description": "Three-candle bearish reversal", "mask": _evening_star},
+    {"name": "Three White Soldiers", "type": "bullish", "confidence": 80, "candles": 3, "group": None,
+     "description": "Steady buying over three sessions", "mask": _three_white_soldiers},
+    {"name": "Three Black Crows", "type": "bearish", "confidence": 80, "candles": 3, "group": None,
+     "description": "Steady selling over three sessions", "mask": _three_black_crows},
+]
+
+PATTERN_NAMES = [p["name"] for p in PATTERNS]
+
+
+def detect_pattern_masks(open, high, low, close, names: list = None):
+    """
+    {pattern name: boolean mask} over the full arrays, in registry order.
+    Candles with no range (high == low) never match.
+    """
+    c = Candles(open, high, low, close)
+    valid = c.range > 0
+    taken = {}
+    masks = {}
+
+    for pattern in PATTERNS:
+        group = pattern["group"]
+        if names is not None and pattern["name"] not in names and group is None:
+            continue
+
+        with np.errstate(invalid="ignore"):
+            mask = pattern["mask"](c) & valid
+
+        if group is not None:
+            claimed = taken.get(group, np.zeros(mask.shape, dtype=bool))
+            mask = mask & ~claimed
+            taken[group] = claimed | mask
+
+        if names is None or pattern["name"] in names:
+            masks[pattern["name"]] = mask
+
+    return masks
+
+
+def _record(pattern, date, price):
+    return {
+        "pattern": pattern["name"],
+        "type": pattern["type"],
+        "confidence": pattern["confidence"],
+        "description": pattern["description"],
+        "date": date,
+        "price": round(float(price), 2),
+    }
+
+
+# ---------------------------------------------------------
+# One symbol
+# ---------------------------------------------------------
+def find_patterns(df: pd.DataFrame, days: int = None, names: list = None):
+    """
+    Patterns in a Ticker.history()-shaped frame, oldest first.
+    Only the last `days` candles are reported; None scans the full history.
+    """
+    masks = detect_pattern_masks(df["Open"], df["High"], df["Low"], df["Close"], names)
+    start = 0 if days is None else max(len(df) - days, 0)
+    dates = df.index.strftime("%Y-%m-%d")
+    close = df["Close"].to_numpy(dtype=float)
+    by_name = {p["name"]: p for p in PATTERNS}
+
+    hits = []
+    for order, (name, mask) in enumerate(masks.items()):
+        for i in np.flatnonzero(mask[start:]) + start:
+            hits.append((i, order, _record(by_name[name], dates[i], close[i])))
+
+    hits.sort(key=lambda hit: (hit[0], hit[1]))
+    return [record for _, _, record in hits]
+
+
+# ---------------------------------------------------------
+# Whole universe / index
+# ---------------------------------------------------------
+def scan_patterns(db: Session, index_name: str = None, names: list = None, days: int = 1):
+    """
+    Which stocks printed the given patterns in the last `days` sessions,
+    from one bars x symbols matrix per OHLC field.
+    """
+    if index_name:
+        symbols = get_index_symbols(db, index_name)
+    else:
+        symbols = [s for (s,) in db.query(Stock.symbol).all()]
+    if not symbols:
+        return None
+
+    # two extra bars so three-candle patterns can see their first candles
+    limit = days + 2
+    close = build_price_matrix(db, symbols, limit, field="close")
+    if close is None:
+        return None
+    open_ = build_price_matrix(db, symbols, limit, field="open")
+    high = build_price_matrix(db, symbols, limit, field="high")
+    low = build_price_matrix(db, symbols, limit, field="low")
+    dates = build_date_matrix(db, symbols, limit)
+
+    masks = detect_pattern_masks(open_.to_numpy(), high.to_numpy(), low.to_numpy(), close.to_numpy(), names)
+    prices = close.to_numpy()
+    columns = list(close.columns)
+    by_name = {p["name"]: p for p in PATTERNS}
+
+    # the market's last `days` sessions; symbols whose own bars stop earlier report nothing older
+    sessions = np.unique(dates[~np.isnat(dates)])
+    recent = dates >= sessions[max(len(sessions) - days, 0)]
+
+    data = []
+    for name, mask in masks.items():
+        rows, cols = np.nonzero(mask & recent)
+        for row, col in zip(rows, cols):
+            data.append({"symbol": columns[col], **_record(by_name[name], str(dates[row, col]), prices[row, col])})
+
+    # newest first, symbols alphabetical within a day
+    data.sort(key=lambda r: r["symbol"])
+    data.sort(key=lambda r: r["date"], reverse=True)
+    return {
+        "index": index_name,
+        "as_of": str(sessions[-1]),
+        "days": days,
+        "count": len(data),
+        "data": data,
+    }
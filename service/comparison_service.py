@@ -1,45 +1,23 @@
 import pandas as pd
 import numpy as np
 from sqlalchemy.orm import Session
-from model.daily_data import DailyData
-from service.analysis_service import (
-    calculate_sma, calculate_ema, calculate_rsi,
-    calculate_macd, calculate_bollinger
+from service.price_store import price_store
+from service.latest_quote_service import get_latest_quotes
+from service.batch_indicator_service import (
+    build_price_matrix, build_date_matrix, compute_indicator_matrix,
+    latest_values, format_indicator_snapshot
 )
 
 # ---------------------------------------------------------
 # Fetch price data for multiple stocks (latest 200 candles)
 # ---------------------------------------------------------
 def get_multiple_stocks_df(db: Session, symbols: list, limit: int = 200):
-    data = {}
-
-    for symbol in symbols:
-        rows = (
-            db.query(DailyData)
-            .filter(DailyData.symbol == symbol)
-            .order_by(DailyData.date.desc())
-            .limit(limit)
-            .all()
-        )
-
-        if not rows:
-            data[symbol] = None
-            continue
-
-        rows.reverse()
-
-        df = pd.DataFrame([{
-            "date": r.date,
-            "open": r.open,
-            "high": r.high,
-            "low": r.low,
-            "close": r.close,
-            "volume": r.volume,
-        } for r in rows])
+    series = price_store.get_many(db, symbols)
 
-        data[symbol] = df
-
-    return data
+    return {
+        symbol: series[symbol].to_frame(limit) if symbol in series else None
+        for symbol in symbols
+    }
 
 
 # ---------------------------------------------------------
@@ -47,16 +25,18 @@ def get_multiple_stocks_df(db: Session, symbols: list, limit: int = 200):
 # ---------------------------------------------------------
 def compare_stocks(db: Session, symbols: list):
     result = {}
+    quotes = get_latest_quotes(db, symbols)
     stocks = get_multiple_stocks_df(db, symbols)
 
     for sym, df in stocks.items():
-        if df is None:
+        quote = quotes.get(sym)
+        if df is None or quote is None:
             result[sym] = {"error": "No data found"}
             continue
 
         result[sym] = {
-            "latest_close": float(df["close"].iloc[-1]),
-            "1_day_change": float(df["close"].pct_change().iloc[-1] * 100),
+            "latest_close": quote.last_close,
+            "1_day_change": quote.change_percent,
             "7_day_change": float(df["close"].pct_change(7).iloc[-1] * 100) if len(df) >= 7 else None,
             "30_day_change": float(df["close"].pct_change(30).iloc[-1] * 100) if len(df) >= 30 else None,
         }
@@ -68,20 +48,23 @@ def compare_stocks(db: Session, symbols: list):
 # 2️⃣ INDICATOR COMPARISON
 # ---------------------------------------------------------
 def compare_indicators(db: Session, symbols: list):
-    result = {}
-    stocks = get_multiple_stocks_df(db, symbols, limit=300)
+    close = build_price_matrix(db, symbols, limit=300)
+    dates = build_date_matrix(db, symbols, limit=300)
+    latest = latest_values(compute_indicator_matrix(close), dates) if close is not None else {}
 
-    for sym, df in stocks.items():
-        if df is None:
+    result = {}
+    for sym in symbols:
+        if sym not in latest:
             result[sym] = {"error": "No data"}
             continue
 
+        snapshot = format_indicator_snapshot(latest[sym])
         result[sym] = {
-            "SMA_20": calculate_sma(df.copy(), 20).tail(1).to_dict(orient="records")[0],
-            "EMA_20": calculate_ema(df.copy(), 20).tail(1).to_dict(orient="records")[0],
-            "RSI": calculate_rsi(df.copy()).tail(1).to_dict(orient="records")[0],
-            "MACD": calculate_macd(df.copy()).tail(1).to_dict(orient="records")[0],
-            "Bollinger": calculate_bollinger(df.copy()).tail(1).to_dict(orient="records")[0],
+            "SMA_20": snapshot["SMA_20"],
+            "EMA_20": snapshot["EMA_20"],
+            "RSI": snapshot["RSI_14"],
+            "MACD": snapshot["MACD"],
+            "Bollinger": snapshot["Bollinger"],
         }
 
     return result
@@ -1,10 +1,9 @@
 # service/daily_updater.py
-import yfinance as yf
-from sqlalchemy.exc import IntegrityError
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from db.database import SessionLocal
-from model.daily_data import DailyData
 from model.stock import Stock
-from datetime import date
+from service.bar_ingest import download_batch, frame_to_rows, upsert_daily_rows, on_bars_written
 import logging
 
 logging.basicConfig(
@@ -13,41 +12,64 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 
-def fetch_and_insert_symbol(db, stock):
-    df = yf.download(stock.symbol, period="1d", progress=False, auto_adjust=False)
-    if df.empty:
-        logging.warning(f"No data for {stock.symbol}")
-        return
-
-    row = DailyData(
-        stock_id=stock.id,
-        symbol=stock.symbol,
-        date=date.today(),
-        open=float(df['Open'].iloc[0]),
-        high=float(df['High'].iloc[0]),
-        low=float(df['Low'].iloc[0]),
-        close=float(df['Close'].iloc[0]),
-        adj_close=float(df['Adj Close'].iloc[0]) if 'Adj Close' in df.columns else float(df['Close'].iloc[0]),
-        volume=int(df['Volume'].iloc[0])
-    )
+DAILY_BATCH_SIZE = int(os.getenv("DAILY_BATCH_SIZE", 50))
+DAILY_WORKERS = int(os.getenv("DAILY_WORKERS", 4))
+# A few days back so a missed run is filled in; upserts make re-fetched days harmless
+DAILY_PERIOD = os.getenv("DAILY_PERIOD", "5d")
 
-    try:
-        db.add(row)
-        db.commit()
-        logging.info(f"Inserted {stock.symbol} for {row.date}")
-    except IntegrityError:
-        db.rollback()
-        logging.info(f"{stock.symbol} for {row.date} already exists. Skipping.")
-
-def update_daily():
+
+def _download(symbols):
+    # The pool already provides the concurrency
+    return download_batch(symbols, period=DAILY_PERIOD, threads=False)
+
+
+def store_batch(db, stocks_by_symbol, frames):
+    """Bulk upsert one downloaded batch. Returns {symbol: earliest date written}."""
+    rows = []
+    written = {}
+    for symbol, frame in frames.items():
+        stock = stocks_by_symbol[symbol]
+        stock_rows = frame_to_rows(frame, stock.id, stock.symbol)
+        if stock_rows:
+            rows.extend(stock_rows)
+            written[symbol] = stock_rows[0]["date"]
+
+    upsert_daily_rows(db, rows)
+    db.commit()
+    return written
+
+
+def update_daily(batch_size: int = DAILY_BATCH_SIZE, workers: int = DAILY_WORKERS):
     db = SessionLocal()
     try:
         stocks = db.query(Stock).all()
         if not stocks:
             logging.warning("No stocks found in DB!")
             return
-        for stock in stocks:
-            fetch_and_insert_symbol(db, stock)
+
+        stocks_by_symbol = {s.symbol: s for s in stocks}
+        symbols = list(stocks_by_symbol)
+        batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+        # Downloads run in the pool; DB writes stay on this thread's session
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_download, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    frames = future.result()
+                except Exception as e:
+                    logging.error(f"Download failed for batch starting {batch[0]}: {e}")
+                    continue
+
+                for symbol in batch:
+                    if symbol not in frames:
+                        logging.warning(f"No data for {symbol}")
+
+                written = store_batch(db, stocks_by_symbol, frames)
+                if written:
+                    on_bars_written(db, written)
+                logging.info(f"Upserted {len(written)}/{len(batch)} symbols")
     finally:
         db.close()
 
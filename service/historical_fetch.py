@@ -1,85 +1,117 @@
 # service/historical_fetch.py
-import yfinance as yf
+import os
+from collections import defaultdict
 from datetime import datetime, timedelta
-from db.database import SessionLocal
+from sqlalchemy import func
+from db.database import SessionLocal, bulk_upsert
 from model.daily_data import DailyData
 from model.stock import Stock
-
-def store_history():
-    db = SessionLocal()
-
-    # Fetch all stocks
-    stocks = db.query(Stock).all()
-    print("Total symbols to fetch:", len(stocks))
-
+from model.backfill_model import BackfillCheckpoint
+from service.bar_ingest import download_batch, frame_to_rows, upsert_daily_rows, on_bars_written
+
+BACKFILL_START = datetime(2010, 1, 1).date()
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", 50))
+
+CHECKPOINT_UPDATE_COLUMNS = ["symbol", "completed_through", "last_bar_date", "status"]
+
+
+def _resume_dates(db, stocks):
+    """
+    First date still to fetch for every stock: the day after its checkpoint,
+    else the day after its latest stored bar, else BACKFILL_START.
+    "empty" checkpoints (nothing came back, possibly a transient failure) are retried.
+    """
+    checkpoints = dict(
+        db.query(BackfillCheckpoint.stock_id, BackfillCheckpoint.completed_through)
+        .filter(BackfillCheckpoint.status != "empty")
+        .all()
+    )
+    latest_bars = dict(
+        db.query(DailyData.stock_id, func.max(DailyData.date))
+        .group_by(DailyData.stock_id)
+        .all()
+    )
+
+    start_dates = {}
     for stock in stocks:
-        sym = stock.symbol
-        print(f"Fetching history for {sym}...")
-
-        # Get latest date for this stock
-        last_record = (
-            db.query(DailyData.date)
-            .filter(DailyData.stock_id == stock.id)
-            .order_by(DailyData.date.desc())
-            .first()
-        )
-
-        if last_record:
-            start_date = last_record[0] + timedelta(days=1)
-        else:
-            start_date = datetime(2010, 1, 1).date()
+        done = checkpoints.get(stock.id) or latest_bars.get(stock.id)
+        start_dates[stock.id] = done + timedelta(days=1) if done else BACKFILL_START
+    return start_dates
+
+
+def _fetch_batch(db, batch, start_date, end_date):
+    """Download, store and checkpoint one batch of stocks sharing a start date"""
+    symbols = [stock.symbol for stock in batch]
+    try:
+        frames = download_batch(symbols, start=start_date, end=end_date)
+    except Exception as e:
+        print(f"Failed to download batch starting {symbols[0]}: {e}")
+        return {}
+
+    rows = []
+    checkpoints = []
+    written = {}
+    for stock in batch:
+        frame = frames.get(stock.symbol)
+        stock_rows = frame_to_rows(frame, stock.id, stock.symbol) if frame is not None else []
+        rows.extend(stock_rows)
+
+        if not stock_rows:
+            # Missing or empty frames can be per-ticker upstream failures:
+            # leave them unchecked so the next run asks again.
+            print(f"No new data for {stock.symbol}")
+            continue
 
-        end_date = datetime.now().date()
+        written[stock.symbol] = start_date
+        checkpoints.append({
+            "stock_id": stock.id,
+            "symbol": stock.symbol,
+            "completed_through": end_date - timedelta(days=1),
+            "last_bar_date": stock_rows[-1]["date"],
+            "status": "done",
+        })
 
-        if start_date > end_date:
-            print(f"{sym} already up-to-date.")
-            continue
+    # Bars and checkpoints commit together, so a crash never skips data
+    upsert_daily_rows(db, rows)
+    bulk_upsert(db, BackfillCheckpoint, checkpoints, CHECKPOINT_UPDATE_COLUMNS)
+    db.commit()
 
-        try:
-            df = yf.download(sym, start=start_date, end=end_date)
-        except Exception as e:
-            print(f"Failed to download {sym}: {e}")
-            continue
+    print(f"✔ Saved {len(rows)} bars for {len(written)}/{len(batch)} symbols")
+    return written
 
-        if df.empty:
-            print(f"No new data for {sym}")
-            continue
 
-        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
-        df.reset_index(inplace=True)
+def store_history(batch_size: int = BACKFILL_BATCH_SIZE):
+    db = SessionLocal()
 
-        for _, row in df.iterrows():
-            date_value = row["Date"].date()
+    try:
+        # Fetch all stocks
+        stocks = db.query(Stock).all()
+        print("Total symbols to fetch:", len(stocks))
 
-            exists = (
-                db.query(DailyData)
-                .filter(DailyData.stock_id == stock.id, DailyData.date == date_value)
-                .first()
-            )
-            if exists:
+        # yfinance `end` is exclusive: fetch through yesterday
+        end_date = datetime.now().date()
+        start_dates = _resume_dates(db, stocks)
+
+        # Group by start date so each batch is one multi-ticker request
+        by_start = defaultdict(list)
+        for stock in stocks:
+            start_date = start_dates[stock.id]
+            if start_date >= end_date:
+                print(f"{stock.symbol} already up-to-date.")
                 continue
+            by_start[start_date].append(stock)
 
-            try:
-                record = DailyData(
-                    stock_id=stock.id,
-                    symbol=stock.symbol,
-                    date=date_value,
-                    open=float(row["Open"]),
-                    high=float(row["High"]),
-                    low=float(row["Low"]),
-                    close=float(row["Close"]),
-                    adj_close=float(row["Adj Close"]) if "Adj Close" in row else float(row["Close"]),
-                    volume=int(row["Volume"])
-                )
-                db.add(record)
-            except Exception as e:
-                print(f"Error inserting {sym} on {date_value}: {e}")
-                continue
+        for start_date, pending in sorted(by_start.items()):
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i + batch_size]
+                print(f"Fetching {len(batch)} symbols from {start_date}...")
 
-        db.commit()
-        print(f"✔ Saved history for {sym}")
+                written = _fetch_batch(db, batch, start_date, end_date)
+                if written:
+                    on_bars_written(db, written)
+    finally:
+        db.close()
 
-    db.close()
     print("✅ All historical data updated!")
 
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+# service/index_graph.py
+import logging
+import os
+import threading
+import time
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from model.index import Index, IndexStock
+from model.stock import Stock
+
+# How often (seconds) the graph checks whether the index tables changed.
+# Membership changes about monthly; writers in this process call invalidate().
+INDEX_GRAPH_CHECK_SECONDS = float(os.getenv("INDEX_GRAPH_CHECK_SECONDS", 300))
+
+
+class IndexGraph:
+    """
+    Immutable snapshot of index membership:
+    index -> stock ids, stock id -> indices, stock id -> (symbol, name).
+    """
+
+    def __init__(self, indexes, stocks, links, version):
+        self.version = version
+        self.index_names = [r.name for r in indexes]
+        self.stocks = {r.id: (r.symbol, r.name) for r in stocks}
+        self.stock_ids = {r.symbol: r.id for r in stocks}
+
+        index_names = {r.id: r.name for r in indexes}
+        members = {name: [] for name in self.index_names}
+        indices_of = {}
+        for index_id, stock_id in links:
+            name = index_names.get(index_id)
+            if name is None or stock_id not in self.stocks:
+                continue
+            members[name].append(stock_id)
+            indices_of.setdefault(stock_id, []).append(name)
+
+        self._members = {name: tuple(ids) for name, ids in members.items()}
+        self._member_sets = {name: frozenset(ids) for name, ids in members.items()}
+        self._indices_of = {stock_id: tuple(names) for stock_id, names in indices_of.items()}
+
+    def member_ids(self, index_name: str):
+        return self._member_sets.get(index_name, frozenset())
+
+    def members(self, index_name: str):
+        """[(symbol, name)] of an index, in the order they were added"""
+        return [self.stocks[stock_id] for stock_id in self._members.get(index_name, ())]
+
+    def symbols(self, index_name: str):
+        return [self.stocks[stock_id][0] for stock_id in self._members.get(index_name, ())]
+
+    def indices_of(self, symbol: str):
+        return list(self._indices_of.get(self.stock_ids.get(symbol), ()))
+
+
+class IndexGraphHolder:
+    """Keeps the current membership graph and reloads it when the index tables change"""
+
+    def __init__(self, check_seconds: float = INDEX_GRAPH_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._graph = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(db: Session):
+        indexes = db.query(func.count(Index.id), func.max(Index.id)).one()
+        links = db.query(func.count(IndexStock.id), func.max(IndexStock.id)).one()
+        stocks = db.query(func.count(Stock.id), func.max(Stock.id)).one()
+        return (*indexes, *links, *stocks)
+
+    def get(self, db: Session):
+        graph = self._graph
+        if graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return graph
+
+        with self._lock:
+            graph = self._graph
+            if graph is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return graph
+            version = self._version(db)
+            if graph is None or graph.version != version:
+                graph = IndexGraph(
+                    db.query(Index.id, Index.name).order_by(Index.id).all(),
+                    db.query(Stock.id, Stock.symbol, Stock.name).all(),
+                    db.query(IndexStock.index_id, IndexStock.stock_id).order_by(IndexStock.id).all(),
+                    version,
+                )
+                self._graph = graph
+                logging.info(f"Index graph loaded: {len(graph.index_names)} indices, {len(graph.stocks)} stocks")
+            self._checked_at = time.monotonic()
+            return graph
+
+    def invalidate(self):
+        """Call after changing indexes / index_stocks / stocks; the next read re-checks the version"""
+        self._checked_at = 0.0
+
+    def index_names(self, db: Session):
+        return list(self.get(db).index_names)
+
+    def members(self, db: Session, index_name: str):
+        return self.get(db).members(index_name)
+
+    def member_ids(self, db: Session, index_name: str):
+        return self.get(db).member_ids(index_name)
+
+    def symbols(self, db: Session, index_name: str):
+        return self.get(db).symbols(index_name)
+
+    def indices_of(self, db: Session, symbol: str):
+        return self.get(db).indices_of(symbol)
+
+
+index_graph = IndexGraphHolder()
@@ -0,0 +1,217 @@
+# service/indicator_state_service.py
+import math
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from model.indicator_state import IndicatorState
+from service.price_store import price_store
+
+# Output points kept per state row (matches the 200-candle window the
+# indicator endpoints used to recompute from)
+HISTORY_POINTS = 200
+
+MACD_PARAMS = (12, 26, 9)
+
+
+# ---------------------------------------------
+# O(1) step functions
+# Each takes the previous state and one bar, returns (state, point|None).
+# Points use the same keys as calculate_* in analysis_service.
+# ---------------------------------------------
+def _ema_step(prev, close, span):
+    if prev is None:
+        return close
+    alpha = 2 / (span + 1)
+    return alpha * close + (1 - alpha) * prev
+
+
+def _step_sma(state, day, close, period):
+    window = (state.get("window", []) + [close])[-period:]
+    state = {"window": window}
+    if len(window) < period:
+        return state, None
+    return state, {"date": day, "close": close, "SMA": sum(window) / period}
+
+
+def _step_ema(state, day, close, period):
+    ema = _ema_step(state.get("ema"), close, period)
+    return {"ema": ema}, {"date": day, "close": close, "EMA": ema}
+
+
+def _step_rsi(state, day, close, period):
+    # Simple rolling average of gains/losses, same as calculate_rsi
+    prev_close = state.get("prev_close")
+    gains = state.get("gains", [])
+    losses = state.get("losses", [])
+
+    if prev_close is not None:
+        delta = close - prev_close
+        gains = (gains + [max(delta, 0.0)])[-period:]
+        losses = (losses + [max(-delta, 0.0)])[-period:]
+
+    state = {"prev_close": close, "gains": gains, "losses": losses}
+    if len(gains) < period:
+        return state, None
+
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    if avg_loss == 0:
+        if avg_gain == 0:
+            return state, None
+        return state, {"date": day, "close": close, "RSI": 100.0}
+
+    rs = avg_gain / avg_loss
+    return state, {"date": day, "close": close, "RSI": 100 - (100 / (1 + rs))}
+
+
+def _step_macd(state, day, close, params):
+    fast, slow, signal_span = params
+    ema_fast = _ema_step(state.get("ema_fast"), close, fast)
+    ema_slow = _ema_step(state.get("ema_slow"), close, slow)
+    macd = ema_fast - ema_slow
+    signal = _ema_step(state.get("signal"), macd, signal_span)
+
+    state = {"ema_fast": ema_fast, "ema_slow": ema_slow, "signal": signal}
+    return state, {"date": day, "MACD": macd, "Signal": signal, "Histogram": macd - signal}
+
+
+def _step_bollinger(state, day, close, period):
+    window = (state.get("window", []) + [close])[-period:]
+    state = {"window": window}
+    if len(window) < period or period < 2:
+        return state, None
+
+    middle = sum(window) / period
+    std = math.sqrt(sum((x - middle) ** 2 for x in window) / (period - 1))
+    return state, {
+        "date": day,
+        "close": close,
+        "Upper": middle + std * 2,
+        "Middle": middle,
+        "Lower": middle - std * 2,
+    }
+
+
+INDICATORS = {
+    "SMA": _step_sma,
+    "EMA": _step_ema,
+    "RSI": _step_rsi,
+    "MACD": _step_macd,
+    "BOLLINGER": _step_bollinger,
+}
+
+
+def _params_key(indicator, period):
+    if indicator == "MACD":
+        return ",".join(str(p) for p in MACD_PARAMS)
+    return str(period)
+
+
+def _step_arg(indicator, period):
+    return MACD_PARAMS if indicator == "MACD" else period
+
+
+# ---------------------------------------------
+# Fold new bars into a state row
+# ---------------------------------------------
+def _advance_row(row: IndicatorState, series):
+    """Apply every bar newer than row.last_date. Returns number of bars applied."""
+    start = 0
+    if row.last_date is not None:
+        start = int(np.searchsorted(series.date, np.datetime64(row.last_date, "D"), side="right"))
+    if start >= len(series):
+        return 0
+
+    step = INDICATORS[row.indicator]
+    arg = _step_arg(row.indicator, int(row.params.split(",")[0]))
+    state = dict(row.state or {})
+    history = list(row.history or [])
+
+    dates = series.date[start:]
+    closes = series.close[start:]
+    for day, close in zip(dates, closes):
+        if np.isnan(close):
+            continue
+        state, point = step(state, str(day), float(close), arg)
+        if point is not None:
+            history.append(point)
+
+    # Reassign (not mutate) so SQLAlchemy sees the JSON change
+    row.state = state
+    row.history = history[-HISTORY_POINTS:]
+    row.last_date = dates[-1].astype(object)
+    return len(dates)
+
+
+def get_indicator_points(db: Session, symbol: str, indicator: str, period: int = None):
+    """
+    Latest indicator points for `symbol` from stored state.
+    Only bars that arrived since the last call are processed;
+    the first call seeds the state from the full cached series.
+    Returns None when the symbol has no price data.
+    """
+    series = price_store.get(db, symbol)
+    if series is None:
+        return None
+
+    params = _params_key(indicator, period)
+    row = (
+        db.query(IndicatorState)
+        .filter(
+            IndicatorState.symbol == symbol,
+            IndicatorState.indicator == indicator,
+            IndicatorState.params == params,
+        )
+        .first()
+    )
+    if row is None:
+        row = IndicatorState(symbol=symbol, indicator=indicator, params=params, state={}, history=[])
+        db.add(row)
+
+    history = row.history
+    if _advance_row(row, series):
+        history = row.history
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request seeded the same state first; our copy is equivalent
+            db.rollback()
+
+    return history
+
+
+def advance_indicator_states(db: Session, symbol: str):
+    """
+    Advance every stored state of `symbol` after new bars are written.
+    Caller is responsible for commit.
+    """
+    series = price_store.get(db, symbol)
+    if series is None:
+        return 0
+
+    rows = db.query(IndicatorState).filter(IndicatorState.symbol == symbol).all()
+    for row in rows:
+        _advance_row(row, series)
+    return len(rows)
+
+
+def latest_indicators(db: Session, symbol: str):
+    """
+    Latest value of each indicator (same shape as calculate_all_indicators).
+    Returns None when the symbol has no price data.
+    """
+    wanted = {
+        "SMA_20": ("SMA", 20),
+        "EMA_20": ("EMA", 20),
+        "RSI_14": ("RSI", 14),
+        "MACD": ("MACD", None),
+        "Bollinger": ("BOLLINGER", 20),
+    }
+
+    result = {}
+    for key, (indicator, period) in wanted.items():
+        points = get_indicator_points(db, symbol, indicator, period)
+        if points is None:
+            return None
+        result[key] = points[-1] if points else None
+    return result
@@ -1,7 +1,6 @@
-from model.daily_data import DailyData
 from sqlalchemy.orm import Session
-import statistics
 import numpy as np
+from service.price_store import price_store
 
 # ------------------------------
 # Helper: normalize symbol
@@ -15,16 +14,13 @@ def normalize_symbol(symbol: str) -> str:
 
 # ------------------------------
 # Helper: fetch recent prices
+# (PriceSeries view, oldest first; None if unknown)
 # ------------------------------
 def get_recent_data(db: Session, symbol: str, days: int = 20):
-    symbol = normalize_symbol(symbol)
-    return (
-        db.query(DailyData)
-        .filter(DailyData.symbol == symbol)
-        .order_by(DailyData.date.desc())
-        .limit(days)
-        .all()
-    )
+    series = price_store.get(db, normalize_symbol(symbol))
+    if series is None:
+        return None
+    return series.tail(days)
 
 
 # ------------------------------
@@ -33,10 +29,10 @@ def get_recent_data(db: Session, symbol: str, days: int = 20):
 def auto_insight(db: Session, symbol: str):
     data = get_recent_data(db, symbol, 10)
 
-    if len(data) < 2:
+    if not data or len(data) < 2:
         return "Not enough data for trend analysis."
 
-    if data[0].close > data[-1].close:
+    if data.close[-1] > data.close[0]:
         return "Stock is showing an upward trend 📈"
     else:
         return "Stock is showing a downward trend 📉"
@@ -48,12 +44,12 @@ def auto_insight(db: Session, symbol: str):
 def momentum_insight(db: Session, symbol: str):
     data = get_recent_data(db, symbol, 7)
 
-    if len(data) < 2:
+    if not data or len(data) < 2:
         return None
 
-    start = data[-1].close
-    end = data[0].close
-    pct = round(((end - start) / start) * 100, 2)
+    start = data.close[0]
+    end = data.close[-1]
+    pct = round(float((end - start) / start) * 100, 2)
 
     return {
         "momentum": "Positive" if pct > 0 else "Negative",
@@ -66,17 +62,14 @@ def momentum_insight(db: Session, symbol: str):
 # ------------------------------
 def volatility_insight(db: Session, symbol: str):
     data = get_recent_data(db, symbol, 20)
-    closes = [d.close for d in data]
 
-    if len(closes) < 2:
+    if not data or len(data) < 3:
         return None
 
-    returns = [
-        (closes[i] - closes[i + 1]) / closes[i + 1]
-        for i in range(len(closes) - 1)
-    ]
+    closes = data.close
+    returns = np.diff(closes) / closes[:-1]
 
-    vol = round(statistics.stdev(returns) * 100, 2)
+    vol = round(float(returns.std(ddof=1)) * 100, 2)
 
     level = "High" if vol > 3 else "Medium" if vol > 1 else "Low"
     return {
@@ -92,13 +85,13 @@ def alert_insight(db: Session, symbol: str):
     data = get_recent_data(db, symbol, 5)
     alerts = []
 
-    if len(data) < 2:
+    if not data or len(data) < 2:
         return alerts
 
-    if data[0].close > max(d.high for d in data[1:]):
+    if data.close[-1] > data.high[:-1].max():
         alerts.append("Price breakout 🚀")
 
-    if data[0].close < min(d.low for d in data[1:]):
+    if data.close[-1] < data.low[:-1].min():
         alerts.append("Price breakdown ⚠️")
 
     return alerts
@@ -110,21 +103,15 @@ def alert_insight(db: Session, symbol: str):
 def ai_generated_insight(db: Session, symbol: str):
     symbol = normalize_symbol(symbol)
 
-    data = (
-        db.query(DailyData)
-        .filter(DailyData.symbol == symbol)
-        .order_by(DailyData.date.desc())
-        .limit(30)
-        .all()
-    )
+    data = get_recent_data(db, symbol, 30)
 
-    if len(data) < 15:
+    if not data or len(data) < 15:
         return {
             "symbol": symbol,
             "ai_insight": "Not enough recent data to generate AI insight."
         }
 
-    closes = np.array([d.close for d in reversed(data)])
+    closes = data.close
     returns = np.diff(closes) / closes[:-1]
 
     avg_return = returns.mean()
@@ -156,15 +143,15 @@ def ai_generated_insight(db: Session, symbol: str):
 def buy_sell_hold_decision(db: Session, symbol: str):
     data = get_recent_data(db, symbol, 10)  # last 10 days
 
-    if len(data) < 5:
+    if not data or len(data) < 5:
         return {
             "symbol": normalize_symbol(symbol),
             "decision": "Not enough data"
         }
 
-    closes = np.array([d.close for d in reversed(data)])
-    sma5 = closes[-5:].mean()
-    today_close = closes[-1]
+    closes = data.close
+    sma5 = float(closes[-5:].mean())
+    today_close = float(closes[-1])
 
     # Momentum
     returns = np.diff(closes) / closes[:-1]
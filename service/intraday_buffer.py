@@ -0,0 +1,102 @@
+# service/intraday_buffer.py
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+import numpy as np
+import yfinance as yf
+
+# A full NSE session is 375 one-minute bars
+INTRADAY_MAX_BARS = int(os.getenv("INTRADAY_MAX_BARS", 400))
+# Calls within this many seconds of the last fetch are served from memory
+INTRADAY_REFRESH_SECONDS = float(os.getenv("INTRADAY_REFRESH_SECONDS", 5))
+# Symbols kept in memory; the least recently requested is evicted first
+INTRADAY_MAX_SYMBOLS = int(os.getenv("INTRADAY_MAX_SYMBOLS", 500))
+
+BAR_FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+class _Ring:
+    def __init__(self):
+        self.bars = deque(maxlen=INTRADAY_MAX_BARS)
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+
+
+def _frame_to_bars(df):
+    if df is None or df.empty:
+        return []
+    columns = (
+        df.index.to_pydatetime().tolist(),
+        np.nan_to_num(df["Open"].to_numpy(dtype=float)).tolist(),
+        np.nan_to_num(df["High"].to_numpy(dtype=float)).tolist(),
+        np.nan_to_num(df["Low"].to_numpy(dtype=float)).tolist(),
+        np.nan_to_num(df["Close"].to_numpy(dtype=float)).tolist(),
+        np.nan_to_num(df["Volume"].to_numpy(dtype=float)).tolist(),
+    )
+    return [dict(zip(BAR_FIELDS, values)) for values in zip(*columns)]
+
+
+class IntradayBuffer:
+    """
+    Today's 1-minute bars per symbol, kept in memory.
+    Each refresh only asks upstream for bars from the last seen minute on.
+    """
+
+    def __init__(self, max_symbols: int = INTRADAY_MAX_SYMBOLS):
+        self.max_symbols = max_symbols
+        self._rings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ring(self, symbol):
+        with self._lock:
+            ring = self._rings.get(symbol)
+            if ring is None:
+                ring = self._rings[symbol] = _Ring()
+                while len(self._rings) > self.max_symbols:
+                    self._rings.popitem(last=False)
+            else:
+                self._rings.move_to_end(symbol)
+            return ring
+
+    def refresh(self, symbol: str):
+        """
+        Bring the symbol's buffer up to date.
+        Returns (all bars of today, bars added or changed by this refresh).
+        """
+        ring = self._ring(symbol)
+        with ring.lock:
+            if time.monotonic() - ring.fetched_at < INTRADAY_REFRESH_SECONDS:
+                return list(ring.bars), []
+
+            last_ts = ring.bars[-1]["timestamp"] if ring.bars else None
+            # New trading day: start over
+            if last_ts is not None and datetime.now(last_ts.tzinfo).date() != last_ts.date():
+                ring.bars.clear()
+                last_ts = None
+
+            ticker = yf.Ticker(symbol)
+            if last_ts is None:
+                df = ticker.history(period="1d", interval="1m")
+            else:
+                # Includes the last seen minute, which may still have been forming
+                df = ticker.history(start=last_ts, interval="1m")
+            ring.fetched_at = time.monotonic()
+
+            changed = []
+            for bar in _frame_to_bars(df):
+                if last_ts is not None and bar["timestamp"] < last_ts:
+                    continue
+                if ring.bars and bar["timestamp"] == ring.bars[-1]["timestamp"]:
+                    ring.bars[-1] = bar
+                elif not ring.bars or bar["timestamp"] > ring.bars[-1]["timestamp"]:
+                    ring.bars.append(bar)
+                else:
+                    continue
+                changed.append(bar)
+
+            return list(ring.bars), changed
+
+
+intraday_buffer = IntradayBuffer()
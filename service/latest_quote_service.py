@@ -0,0 +1,83 @@
+# service/latest_quote_service.py
+from datetime import datetime
+import numpy as np
+from sqlalchemy.orm import Session
+from db.database import bulk_upsert
+from model.latest_quote import LatestQuote
+from service.price_store import price_store
+
+AVG_VOLUME_BARS = 20
+
+LATEST_QUOTE_UPDATE_COLUMNS = [
+    "symbol", "last_date", "last_close", "prev_close", "change", "change_percent",
+    "high_52w", "low_52w", "avg_volume_20", "updated_at",
+]
+
+
+def _nan_to_none(value):
+    return None if np.isnan(value) else float(value)
+
+
+def quote_from_series(series):
+    """latest_quote row for one PriceSeries, or None if it has no closes"""
+    valid = np.flatnonzero(~np.isnan(series.close))
+    if len(valid) == 0:
+        return None
+
+    last = valid[-1]
+    last_close = float(series.close[last])
+    prev_close = float(series.close[valid[-2]]) if len(valid) > 1 else None
+    change = last_close - prev_close if prev_close else None
+
+    # bars of the trailing 52 weeks, up to and including the last close
+    start = int(np.searchsorted(series.date, series.date[last] - np.timedelta64(365, "D"), side="right"))
+    highs = series.high[start:last + 1]
+    lows = series.low[start:last + 1]
+
+    return {
+        "stock_id": series.stock_id,
+        "symbol": series.symbol,
+        "last_date": series.date[last].astype(object),
+        "last_close": last_close,
+        "prev_close": prev_close,
+        "change": change,
+        "change_percent": change / prev_close * 100 if change is not None else None,
+        "high_52w": _nan_to_none(np.nanmax(highs)) if not np.isnan(highs).all() else None,
+        "low_52w": _nan_to_none(np.nanmin(lows)) if not np.isnan(lows).all() else None,
+        "avg_volume_20": float(series.volume[max(last - AVG_VOLUME_BARS + 1, 0):last + 1].mean()),
+        "updated_at": datetime.now(),
+    }
+
+
+def refresh_latest_quotes(db: Session, symbols: list):
+    """Recompute latest_quote rows of `symbols` from their bars. Caller commits."""
+    series = price_store.get_many(db, symbols)
+    rows = [row for row in (quote_from_series(s) for s in series.values()) if row is not None]
+    bulk_upsert(db, LatestQuote, rows, LATEST_QUOTE_UPDATE_COLUMNS)
+    return len(rows)
+
+
+def get_latest_quotes(db: Session, symbols: list):
+    """
+    {symbol: LatestQuote} for the given symbols, one indexed lookup.
+    Symbols that have bars but no row yet are filled in on the way.
+    """
+    if not symbols:
+        return {}
+    quotes = {q.symbol: q for q in db.query(LatestQuote).filter(LatestQuote.symbol.in_(symbols)).all()}
+
+    missing = [s for s in symbols if s not in quotes]
+    if missing and refresh_latest_quotes(db, missing):
+        db.commit()
+        for q in db.query(LatestQuote).filter(LatestQuote.symbol.in_(missing)).all():
+            quotes[q.symbol] = q
+    return quotes
+
+
+def rebuild_latest_quotes(db: Session, symbols: list, batch_size: int = 200):
+    """Recompute latest_quote for many symbols (initial fill / repair)"""
+    written = 0
+    for start in range(0, len(symbols), batch_size):
+        written += refresh_latest_quotes(db, symbols[start:start + batch_size])
+        db.commit()
+    return written
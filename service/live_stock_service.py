@@ -1,8 +1,14 @@
 from model.intraday_model import IntradayData
-from db.database import SessionLocal
+from db.database import SessionLocal, bulk_upsert
+import os
 import re
 import yfinance as yf
 from datetime import datetime
+from service.quote_cache import quote_cache, batch_quote_cache
+
+INTRADAY_UPDATE_COLUMNS = ["open", "high", "low", "close", "volume"]
+# Parallel connections used by one multi-ticker quote download
+QUOTE_DOWNLOAD_THREADS = int(os.getenv("QUOTE_DOWNLOAD_THREADS", 8))
 
 
 def _clean_name(name: str | None) -> str | None:
@@ -15,6 +21,12 @@ def _clean_name(name: str | None) -> str | None:
 
 
 def get_live_yf_price(symbol: str):
+    """Live quote, served from the shared quote cache"""
+    return quote_cache.get(symbol, fetch_live_yf_price)
+
+
+def fetch_live_yf_price(symbol: str):
+    """Fetch a live quote from Yahoo Finance (two upstream calls)"""
     try:
         stock = yf.Ticker(symbol)
 
@@ -68,25 +80,81 @@ def get_live_yf_price(symbol: str):
     except Exception as e:
         raise Exception(f"Failed to fetch {symbol} price: {e}")
     
+def get_live_yf_prices(symbols: list[str]):
+    """
+    {symbol: quote} for many symbols. Fresh full quotes are reused; the
+    rest come from the batch cache, whose misses share one multi-ticker download.
+    """
+    quotes = {}
+    for symbol in dict.fromkeys(symbols):
+        cached = quote_cache.peek(symbol)
+        if cached is not None:
+            quotes[symbol] = cached
+    missing = [s for s in dict.fromkeys(symbols) if s not in quotes]
+    if missing:
+        quotes.update(batch_quote_cache.get_many(missing, fetch_live_yf_prices))
+    return quotes
+
+
+def fetch_live_yf_prices(symbols: list[str]):
+    """
+    Price quotes for many symbols from one yf.download call (daily bars,
+    last two sessions). No per-ticker .info lookups, so no name / sector.
+    """
+    data = yf.download(
+        symbols, period="2d", interval="1d", group_by="ticker",
+        auto_adjust=False, progress=False, threads=max(1, min(QUOTE_DOWNLOAD_THREADS, len(symbols))),
+    )
+    if data is None or data.empty:
+        return {}
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tickers = set(data.columns.get_level_values(0)) if data.columns.nlevels > 1 else None
+    quotes = {}
+    for symbol in symbols:
+        if tickers is None:
+            frame = data
+        elif symbol in tickers:
+            frame = data[symbol]
+        else:
+            continue
+        frame = frame.dropna(subset=["Close"])
+        if frame.empty:
+            continue
+
+        current = frame.iloc[-1]
+        price = float(current["Close"])
+        quotes[symbol] = {
+            "symbol": symbol,
+            "price": price,
+            "open": float(current["Open"]),
+            "high": float(current["High"]),
+            "low": float(current["Low"]),
+            "volume": int(current["Volume"]) if current["Volume"] > 0 else 0,
+            "previousClose": float(frame.iloc[-2]["Close"]) if len(frame) >= 2 else price,
+            "timestamp": timestamp,
+        }
+    return quotes
+
+
 def _persist_intraday_batch(sym: str, rows: list[dict]):
+    """One bulk upsert on (symbol, timestamp); re-sent minutes overwrite the forming bar"""
+    if not rows:
+        return
     db = SessionLocal()
     try:
-        for r in rows:
-            exists = db.query(IntradayData.id).filter(
-                IntradayData.symbol == sym,
-                IntradayData.timestamp == r["timestamp"]
-            ).first()
-            if exists:
-                continue
-            db.add(IntradayData(
-                symbol=sym,
-                timestamp=r["timestamp"],
-                open=r["open"],
-                high=r["high"],
-                low=r["low"],
-                close=r["close"],
-                volume=r["volume"],
-            ))
+        bulk_upsert(db, IntradayData, [
+            {
+                "symbol": sym,
+                "timestamp": r["timestamp"],
+                "open": r["open"],
+                "high": r["high"],
+                "low": r["low"],
+                "close": r["close"],
+                "volume": int(r["volume"]),
+            }
+            for r in rows
+        ], INTRADAY_UPDATE_COLUMNS)
         db.commit()
     except Exception:
         db.rollback()
@@ -0,0 +1,95 @@
+# service/market_movers_service.py
+import os
+import threading
+import time
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from model.daily_data import DailyData
+from model.latest_quote import LatestQuote
+from service.index_graph import index_graph
+from service.latest_quote_service import get_latest_quotes
+
+# index_name -> ((trading_day, quotes version, membership version), cached_at,
+#                [(symbol, name, percent_change), ...] best first)
+_movers_cache = {}
+_cache_lock = threading.Lock()
+
+# Stocks whose last bar is older than this many calendar days before
+# the latest trading day are not ranked.
+LOOKBACK_DAYS = 10
+# Upper bound on the age of a cached ranking; the quotes version only has
+# DATETIME (second) resolution, so writes within one second can share it.
+MOVERS_CACHE_SECONDS = float(os.getenv("MOVERS_CACHE_SECONDS", 300))
+
+
+def latest_trading_day(db: Session):
+    return db.query(func.max(DailyData.date)).scalar()
+
+
+def quotes_version(db: Session):
+    """
+    Changes whenever any latest_quote row is rewritten. Ingestion runs in
+    another process, so its invalidate_movers() call never reaches this cache.
+    """
+    return db.query(func.max(LatestQuote.updated_at)).scalar()
+
+
+def _compute_changes(db: Session, index_name: str, trading_day):
+    """
+    Latest percent change of every index constituent, read from latest_quote.
+    Stocks without a bar in the last LOOKBACK_DAYS are left out.
+    """
+    members = index_graph.members(db, index_name)
+    quotes = get_latest_quotes(db, [symbol for symbol, _ in members])
+    cutoff = trading_day - timedelta(days=LOOKBACK_DAYS)
+
+    changes = []
+    for symbol, name in members:
+        quote = quotes.get(symbol)
+        if quote is None or quote.change_percent is None or quote.last_date < cutoff:
+            continue
+        changes.append((symbol, name, quote.change_percent))
+    return changes
+
+
+def get_ranked_changes(db: Session, index_name: str):
+    """
+    Constituents of `index_name` sorted by latest percent change, best first.
+    Recomputed only when the trading day, the stored quotes or the index
+    membership change; gainers, losers and every `limit` are slices of the same list.
+    """
+    trading_day = latest_trading_day(db)
+    if trading_day is None:
+        return []
+    key = (trading_day, quotes_version(db), index_graph.get(db).version)
+
+    with _cache_lock:
+        cached = _movers_cache.get(index_name)
+    if cached and cached[0] == key and time.monotonic() - cached[1] < MOVERS_CACHE_SECONDS:
+        return cached[2]
+
+    ranked = sorted(_compute_changes(db, index_name, trading_day), key=lambda x: x[2], reverse=True)
+
+    # Unknown index names are not cached
+    if ranked:
+        with _cache_lock:
+            _movers_cache[index_name] = (key, time.monotonic(), ranked)
+    return ranked
+
+
+def top_gainers(db: Session, index_name: str, limit: int):
+    return get_ranked_changes(db, index_name)[:limit]
+
+
+def top_losers(db: Session, index_name: str, limit: int):
+    ranked = get_ranked_changes(db, index_name)
+    return ranked[::-1][:limit]
+
+
+def invalidate_movers(index_name: str = None):
+    with _cache_lock:
+        if index_name is None:
+            _movers_cache.clear()
+        else:
+            _movers_cache.pop(index_name, None)
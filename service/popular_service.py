@@ -0,0 +1,120 @@
+# service/popular_service.py
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from model.daily_data import DailyData
+
+POPULAR_WINDOW_DAYS = 30
+# Trailing days re-read on every reload: the daily updater rewrites the
+# last few bars on every run, and symbols land at different times.
+POPULAR_RELOAD_DAYS = 5
+# The updater runs in its own process, so its writes never reach
+# on_bars_written here; reload the trailing days at least this often.
+POPULAR_RELOAD_SECONDS = float(os.getenv("POPULAR_RELOAD_SECONDS", 60))
+
+
+class RollingVolume:
+    """
+    Total volume per symbol over the last POPULAR_WINDOW_DAYS calendar days.
+    Days entering the window are added and days leaving it subtracted,
+    so the full GROUP BY only runs once per process.
+    """
+
+    def __init__(self, window_days: int = POPULAR_WINDOW_DAYS):
+        self.window_days = window_days
+        self._days = {}  # date -> {symbol: volume}
+        self._totals = {}  # symbol -> volume over the window
+        self._counts = defaultdict(int)  # symbol -> days of the window it traded on
+        self._cutoff = None
+        self._max_date = None
+        self._reloaded_at = 0.0
+        self._ranked = None  # [(symbol, volume)] highest first, until the next change
+        self._lock = threading.Lock()
+
+    def _cutoff_for_today(self):
+        return datetime.now().date() - timedelta(days=self.window_days)
+
+    def _set(self, day, symbol, volume):
+        bucket = self._days.setdefault(day, {})
+        if symbol not in bucket:
+            self._counts[symbol] += 1
+        self._totals[symbol] = self._totals.get(symbol, 0.0) + volume - bucket.get(symbol, 0.0)
+        bucket[symbol] = volume
+
+    def _load(self, db: Session, since, symbols: list = None):
+        query = db.query(DailyData.symbol, DailyData.date, DailyData.volume).filter(DailyData.date >= since)
+        if symbols is not None:
+            query = query.filter(DailyData.symbol.in_(symbols))
+        for symbol, day, volume in query:
+            self._set(day, symbol, float(volume or 0))
+        self._ranked = None
+
+    def _remove_days(self, days):
+        for day in list(days):
+            for symbol, volume in self._days.pop(day).items():
+                self._counts[symbol] -= 1
+                if self._counts[symbol] == 0:
+                    del self._counts[symbol]
+                    del self._totals[symbol]
+                else:
+                    self._totals[symbol] -= volume
+            self._ranked = None
+
+    def _expire(self, cutoff):
+        self._remove_days([d for d in self._days if d < cutoff])
+
+    def _reload_from(self, db: Session, since):
+        """Replace everything from `since` on with what daily_data holds now"""
+        self._remove_days([d for d in self._days if d >= since])
+        self._load(db, since)
+
+    def refresh(self, db: Session):
+        """
+        Every POPULAR_RELOAD_SECONDS: slide the window to today and re-read
+        the trailing POPULAR_RELOAD_DAYS (plus any newer days) from daily_data.
+        """
+        if self._cutoff is not None and time.monotonic() - self._reloaded_at < POPULAR_RELOAD_SECONDS:
+            return
+
+        with self._lock:
+            if self._cutoff is not None and time.monotonic() - self._reloaded_at < POPULAR_RELOAD_SECONDS:
+                return
+            cutoff = self._cutoff_for_today()
+            max_date = db.query(func.max(DailyData.date)).scalar()
+
+            if self._cutoff is None:
+                self._load(db, cutoff)
+            else:
+                if cutoff > self._cutoff:
+                    self._expire(cutoff)
+                since = cutoff
+                anchor = self._max_date or max_date
+                if anchor is not None:
+                    since = max(cutoff, anchor - timedelta(days=POPULAR_RELOAD_DAYS))
+                self._reload_from(db, since)
+            self._cutoff = cutoff
+            self._max_date = max_date
+            self._reloaded_at = time.monotonic()
+
+    def on_bars_written(self, db: Session, written: dict):
+        """Re-read the window days of the symbols that just received bars"""
+        with self._lock:
+            if self._cutoff is None or not written:
+                return
+            since = max(self._cutoff, min(written.values()))
+            self._load(db, since, list(written))
+
+    def top(self, db: Session, limit: int):
+        self.refresh(db)
+        with self._lock:
+            if self._ranked is None:
+                self._ranked = sorted(self._totals.items(), key=lambda item: item[1], reverse=True)
+            ranked = self._ranked
+        return ranked[:limit]
+
+
+popular_volume = RollingVolume()
@@ -2,6 +2,8 @@ from sqlalchemy.orm import Session
 from db.database import SessionLocal
 from model.stock import Stock
 from model.index import Index, IndexStock
+from service.index_graph import index_graph
+from service.search_index import stock_search
 
 # -------------------------------
 # MAJOR INDEXES
@@ -126,6 +128,8 @@ def add_stocks(db: Session, stock_list, exchange="NSE"):
         if not db.query(Stock).filter(Stock.symbol == symbol).first():
             db.add(Stock(symbol=symbol, name=name, exchange=exchange))
     db.commit()
+    stock_search.invalidate()
+    index_graph.invalidate()
 
 
 def populate_index(db: Session, index_name, symbols):
@@ -142,6 +146,7 @@ def populate_index(db: Session, index_name, symbols):
             ).first():
                 db.add(IndexStock(index_id=index_obj.id, stock_id=stock.id))
     db.commit()
+    index_graph.invalidate()
 
 
 def main():
@@ -0,0 +1,237 @@
+# service/price_store.py
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from model.daily_data import DailyData
+
+# Memory budget for cached series and how long an entry is trusted before
+# it is re-read (covers writers running in another process).
+PRICE_STORE_MAX_BYTES = int(os.getenv("PRICE_STORE_MAX_BYTES", 256 * 1024 * 1024))
+PRICE_STORE_TTL_SECONDS = int(os.getenv("PRICE_STORE_TTL_SECONDS", 900))
+
+PRICE_FIELDS = ("date", "open", "high", "low", "close", "volume")
+
+
+class PriceSeries:
+    """
+    Contiguous OHLCV arrays for one symbol, oldest first.
+    Arrays are read-only; slicing returns views, never copies.
+    """
+
+    def __init__(self, symbol, stock_id, date, open, high, low, close, volume):
+        self.symbol = symbol
+        self.stock_id = stock_id
+        self.date = date        # datetime64[D]
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        for field in PRICE_FIELDS:
+            getattr(self, field).flags.writeable = False
+
+        self.loaded_at = time.monotonic()
+        # Derived structures built over this series (dropped with it)
+        self.derived = {}
+
+    def __len__(self):
+        return len(self.date)
+
+    @property
+    def nbytes(self):
+        """Price arrays plus everything derived from them (counted in the store's budget)"""
+        own = sum(getattr(self, field).nbytes for field in PRICE_FIELDS)
+        return own + sum(getattr(d, "nbytes", 0) for d in self.derived.values())
+
+    def tail(self, n: int):
+        """Last `n` bars as a view on the same buffers"""
+        return self._slice(slice(max(len(self) - n, 0), None))
+
+    def since(self, start_date):
+        """Bars dated on or after `start_date`, as a view"""
+        lo = int(np.searchsorted(self.date, np.datetime64(start_date, "D"), side="left"))
+        return self._slice(slice(lo, None))
+
+    def _slice(self, sl):
+        view = PriceSeries.__new__(PriceSeries)
+        view.symbol = self.symbol
+        view.stock_id = self.stock_id
+        for field in PRICE_FIELDS:
+            setattr(view, field, getattr(self, field)[sl])
+        view.loaded_at = self.loaded_at
+        view.derived = {}
+        return view
+
+    def to_frame(self, limit: int = None) -> pd.DataFrame:
+        """
+        DataFrame over the last `limit` bars.
+        Price columns wrap the cached buffers without copying.
+        """
+        series = self.tail(limit) if limit else self
+        return pd.DataFrame({
+            "date": series.date.astype(object),
+            "open": series.open,
+            "high": series.high,
+            "low": series.low,
+            "close": series.close,
+            "volume": series.volume,
+        }, copy=False)
+
+
+def _build_series(symbol, rows):
+    stock_ids, dates, opens, highs, lows, closes, volumes = zip(*rows)
+    return PriceSeries(
+        symbol=symbol,
+        stock_id=stock_ids[-1],
+        date=np.array(dates, dtype="datetime64[D]"),
+        open=np.array(opens, dtype=float),
+        high=np.array(highs, dtype=float),
+        low=np.array(lows, dtype=float),
+        close=np.array(closes, dtype=float),
+        volume=np.nan_to_num(np.array(volumes, dtype=float)).astype(np.int64),
+    )
+
+
+class PriceStore:
+    """Process-wide LRU cache of PriceSeries, bounded by a byte budget."""
+
+    def __init__(self, max_bytes: int = PRICE_STORE_MAX_BYTES, ttl_seconds: int = PRICE_STORE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    # -----------------------------------------
+    # Reads
+    # -----------------------------------------
+    def get(self, db: Session, symbol: str):
+        """Full series for `symbol`, loading it from daily_data on a miss"""
+        return self.get_many(db, [symbol]).get(symbol)
+
+    def get_many(self, db: Session, symbols: list):
+        """
+        Series for several symbols. All misses are loaded with one query.
+        Unknown symbols are left out of the result.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for symbol in symbols:
+                entry = self._entries.get(symbol)
+                if entry is not None and time.monotonic() - entry.loaded_at < self.ttl_seconds:
+                    self._entries.move_to_end(symbol)
+                    found[symbol] = entry
+                    self.hits += 1
+                else:
+                    missing.append(symbol)
+            self.misses += len(missing)
+
+        if missing:
+            loaded = self._load(db, missing)
+            with self._lock:
+                for symbol, series in loaded.items():
+                    self._put(symbol, series)
+            found.update(loaded)
+
+        return found
+
+    def frame(self, db: Session, symbol: str, limit: int = None):
+        """Latest `limit` bars as a DataFrame (oldest first), or None"""
+        series = self.get(db, symbol)
+        if series is None:
+            return None
+        return series.to_frame(limit)
+
+    def derive(self, series: PriceSeries, key: str, build):
+        """
+        series.derived[key], built with build(series) on first use. Its size
+        is charged to the byte budget, so derived structures are evicted with
+        their series instead of growing memory past max_bytes.
+        """
+        value = series.derived.get(key)
+        if value is not None:
+            return value
+        value = build(series)
+        with self._lock:
+            if key in series.derived:
+                return series.derived[key]
+            series.derived[key] = value
+            if self._entries.get(series.symbol) is series:
+                self._bytes += getattr(value, "nbytes", 0)
+                self._entries.move_to_end(series.symbol)
+                self._evict()
+        return value
+
+    # -----------------------------------------
+    # Invalidation
+    # -----------------------------------------
+    def invalidate(self, symbol: str = None):
+        """Drop one symbol (after new bars are written) or everything"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            entry = self._entries.pop(symbol, None)
+            if entry is not None:
+                self._bytes -= entry.nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "symbols": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # -----------------------------------------
+    # Internals
+    # -----------------------------------------
+    def _load(self, db: Session, symbols: list):
+        rows = (
+            db.query(
+                DailyData.symbol,
+                DailyData.stock_id,
+                DailyData.date,
+                DailyData.open,
+                DailyData.high,
+                DailyData.low,
+                DailyData.close,
+                DailyData.volume,
+            )
+            .filter(DailyData.symbol.in_(symbols))
+            .order_by(DailyData.symbol, DailyData.date.asc())
+            .all()
+        )
+
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(row[1:])
+
+        return {symbol: _build_series(symbol, sym_rows) for symbol, sym_rows in grouped.items()}
+
+    def _put(self, symbol, series):
+        old = self._entries.pop(symbol, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._entries[symbol] = series
+        self._bytes += series.nbytes
+        self._evict()
+
+    def _evict(self):
+        # Evict least recently used, but always keep the newest entry
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+
+price_store = PriceStore()
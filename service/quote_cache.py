@@ -0,0 +1,210 @@
+# service/quote_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Fresh for QUOTE_TTL_SECONDS; after that served stale (while one background
+# refresh runs) until QUOTE_STALE_SECONDS, then treated as a miss.
+QUOTE_TTL_SECONDS = float(os.getenv("QUOTE_TTL_SECONDS", 15))
+QUOTE_STALE_SECONDS = float(os.getenv("QUOTE_STALE_SECONDS", 120))
+QUOTE_CACHE_MAX_SYMBOLS = int(os.getenv("QUOTE_CACHE_MAX_SYMBOLS", 5000))
+
+
+class _Flight:
+    """One in-progress upstream fetch that other callers can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class QuoteCache:
+    """
+    TTL cache for live quotes with stale-while-revalidate and per-symbol
+    single-flight: concurrent requests for a symbol share one upstream fetch.
+    """
+
+    def __init__(self, ttl: float = QUOTE_TTL_SECONDS, stale_ttl: float = QUOTE_STALE_SECONDS,
+                 max_symbols: int = QUOTE_CACHE_MAX_SYMBOLS):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_symbols = max_symbols
+        self._entries = OrderedDict()  # symbol -> (fetched_at, quote)
+        self._flights = {}  # symbol -> _Flight
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def get(self, symbol: str, loader):
+        """Quote for `symbol`; `loader(symbol)` is called at most once at a time per symbol"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and entry[1] is None:
+                if time.monotonic() - entry[0] < self.ttl:
+                    self.hits += 1
+                    raise LookupError(f"No quote for {symbol}")
+                entry = None
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(symbol)
+                    return entry[1]
+                if age < self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(symbol)
+                    if symbol not in self._flights:
+                        flight = self._flights[symbol] = _Flight()
+                        self.refreshes += 1
+                        threading.Thread(
+                            target=self._fetch, args=(symbol, loader, flight), daemon=True
+                        ).start()
+                    return entry[1]
+
+            flight = self._flights.get(symbol)
+            leader = flight is None
+            if leader:
+                flight = self._flights[symbol] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._fetch(symbol, loader, flight)
+        else:
+            flight.event.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, symbol: str):
+        """Fresh cached quote for `symbol`, or None; never fetches"""
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and entry[1] is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(symbol)
+                return entry[1]
+        return None
+
+    def get_many(self, symbols: list, batch_loader):
+        """
+        {symbol: quote} for several symbols. Everything that has to go
+        upstream is fetched by a single `batch_loader(symbols) -> {symbol: quote}`
+        call; symbols the loader can't resolve are left out, and remembered
+        as misses for `ttl` so they aren't requested again on every call.
+        """
+        result = {}
+        stale, mine, waiting = {}, {}, {}
+        with self._lock:
+            now = time.monotonic()
+            for symbol in dict.fromkeys(symbols):
+                entry = self._entries.get(symbol)
+                if entry is not None and entry[1] is None:
+                    if now - entry[0] < self.ttl:
+                        self.hits += 1
+                        continue
+                    entry = None
+                if entry is not None:
+                    age = now - entry[0]
+                    if age < self.stale_ttl:
+                        result[symbol] = entry[1]
+                        self._entries.move_to_end(symbol)
+                        if age < self.ttl:
+                            self.hits += 1
+                            continue
+                        self.stale_hits += 1
+                        if symbol not in self._flights:
+                            stale[symbol] = self._flights[symbol] = _Flight()
+                            self.refreshes += 1
+                        continue
+
+                flight = self._flights.get(symbol)
+                if flight is None:
+                    mine[symbol] = self._flights[symbol] = _Flight()
+                    self.misses += 1
+                else:
+                    waiting[symbol] = flight
+                    self.coalesced += 1
+
+        if stale:
+            threading.Thread(target=self._fetch_many, args=(stale, batch_loader), daemon=True).start()
+        if mine:
+            self._fetch_many(mine, batch_loader)
+
+        for symbol, flight in {**mine, **waiting}.items():
+            flight.event.wait()
+            if flight.error is None:
+                result[symbol] = flight.value
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "symbols": len(self._entries),
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "ttl_seconds": self.ttl,
+                "stale_seconds": self.stale_ttl,
+            }
+
+    def _fetch(self, symbol, loader, flight):
+        try:
+            flight.value = loader(symbol)
+            with self._lock:
+                self._store(symbol, flight.value)
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._flights.pop(symbol, None)
+            flight.event.set()
+
+    def _fetch_many(self, flights: dict, batch_loader):
+        try:
+            quotes, error = batch_loader(list(flights)), None
+        except Exception as e:
+            quotes, error = {}, e
+        with self._lock:
+            if error is not None:
+                self.errors += 1
+            for symbol, flight in flights.items():
+                quote = quotes.get(symbol)
+                if quote is None:
+                    flight.error = error or LookupError(f"No quote for {symbol}")
+                    if error is None:
+                        # upstream answered without this symbol: cache the miss
+                        self._store(symbol, None)
+                else:
+                    flight.value = quote
+                    self._store(symbol, quote)
+                self._flights.pop(symbol, None)
+        for flight in flights.values():
+            flight.event.set()
+
+    def _store(self, symbol, quote):
+        self._entries[symbol] = (time.monotonic(), quote)
+        self._entries.move_to_end(symbol)
+        while len(self._entries) > self.max_symbols:
+            self._entries.popitem(last=False)
+
+
+quote_cache = QuoteCache()
+# Price-only quotes from multi-ticker downloads (no name / sector metadata),
+# kept apart so /stocks/price never serves a stripped-down quote.
+batch_quote_cache = QuoteCache()
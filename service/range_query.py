@@ -0,0 +1,86 @@
+# service/range_query.py
+import numpy as np
+from service.price_store import price_store
+
+
+class RangeIndex:
+    """
+    Constant-time OHLCV summaries over any date range of one PriceSeries.
+
+    - sparse tables give max(high) / min(low) of any span in O(1)
+    - prefix sums give total volume and log-return of any span in O(1)
+    Locating the range in the date array is a binary search.
+    """
+
+    def __init__(self, series):
+        self.date = series.date
+        self.open = series.open
+        self.close = series.close
+
+        self._max_high = self._sparse_table(np.where(np.isnan(series.high), -np.inf, series.high), np.maximum)
+        self._min_low = self._sparse_table(np.where(np.isnan(series.low), np.inf, series.low), np.minimum)
+
+        self._volume_sum = np.concatenate(([0], np.cumsum(series.volume)))
+
+        log_close = np.log(series.close)
+        log_returns = np.nan_to_num(np.diff(log_close))
+        self._log_return_sum = np.concatenate(([0.0], np.cumsum(log_returns)))
+
+    @property
+    def nbytes(self):
+        tables = self._max_high + self._min_low + [self._volume_sum, self._log_return_sum]
+        return sum(t.nbytes for t in tables)
+
+    @staticmethod
+    def _sparse_table(values, op):
+        levels = [values]
+        span = 1
+        while span * 2 <= len(values):
+            prev = levels[-1]
+            levels.append(op(prev[:-span], prev[span:]))
+            span *= 2
+        return levels
+
+    @staticmethod
+    def _query(table, op, lo, hi):
+        """Reduce values[lo:hi + 1] with two overlapping power-of-two spans"""
+        level = int(hi - lo + 1).bit_length() - 1
+        row = table[level]
+        return op(row[lo], row[hi - (1 << level) + 1])
+
+    def locate(self, start_date, end_date):
+        """Inclusive positions of the bars inside [start_date, end_date], or None"""
+        lo = int(np.searchsorted(self.date, np.datetime64(start_date, "D"), side="left"))
+        hi = int(np.searchsorted(self.date, np.datetime64(end_date, "D"), side="right")) - 1
+        if lo > hi:
+            return None
+        return lo, hi
+
+    def summary(self, start_date, end_date):
+        """OHLC, volume and return of the bars inside the range, or None"""
+        bounds = self.locate(start_date, end_date)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+
+        high = self._query(self._max_high, np.maximum, lo, hi)
+        low = self._query(self._min_low, np.minimum, lo, hi)
+        open_price = self.open[lo]
+        close_price = self.close[hi]
+        log_return = self._log_return_sum[hi] - self._log_return_sum[lo]
+
+        return {
+            "start_date": str(self.date[lo]),
+            "end_date": str(self.date[hi]),
+            "open": None if np.isnan(open_price) else float(open_price),
+            "close": None if np.isnan(close_price) else float(close_price),
+            "high": None if np.isinf(high) else float(high),
+            "low": None if np.isinf(low) else float(low),
+            "volume": int(self._volume_sum[hi + 1] - self._volume_sum[lo]),
+            "return_percent": float(np.expm1(log_return) * 100),
+        }
+
+
+def get_range_index(series):
+    """RangeIndex for a cached series, built once, counted in the PriceStore budget and dropped with it"""
+    return price_store.derive(series, "range_index", RangeIndex)
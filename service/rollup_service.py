@@ -0,0 +1,107 @@
+# service/rollup_service.py
+import numpy as np
+from datetime import date
+from sqlalchemy.orm import Session
+from db.database import bulk_upsert
+from model.daily_data import DailyData
+from model.bar_model import MonthlyBar, YearlyBar
+
+BAR_UPDATE_COLUMNS = ["stock_id", "open", "high", "low", "close", "volume", "start_date", "end_date"]
+
+
+def _nullable(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+# ---------------------------------------------------------
+# Vectorized rollup: first open / max high / min low / last close
+# ---------------------------------------------------------
+def rollup_ohlc(keys, dates, opens, highs, lows, closes, volumes):
+    """
+    Collapse date-ordered daily arrays into one bar per distinct key.
+    `keys` must be non-decreasing (e.g. month or year of each row).
+    """
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    return {
+        "key": keys[starts],
+        "open": opens[starts],
+        "high": np.fmax.reduceat(highs, starts),
+        "low": np.fmin.reduceat(lows, starts),
+        "close": closes[ends],
+        "volume": np.add.reduceat(volumes, starts),
+        "start_date": dates[starts],
+        "end_date": dates[ends],
+    }
+
+
+def _bar_rows(bars, symbol, stock_id):
+    rows = []
+    for i in range(len(bars["key"])):
+        start_date = bars["start_date"][i].astype(object)
+        rows.append({
+            "stock_id": stock_id,
+            "symbol": symbol,
+            "year": start_date.year,
+            "month": start_date.month,
+            "open": _nullable(bars["open"][i]),
+            "high": _nullable(bars["high"][i]),
+            "low": _nullable(bars["low"][i]),
+            "close": _nullable(bars["close"][i]),
+            "volume": int(bars["volume"][i]),
+            "start_date": start_date,
+            "end_date": bars["end_date"][i].astype(object),
+        })
+    return rows
+
+
+# ---------------------------------------------------------
+# Refresh monthly_bars / yearly_bars for one symbol
+# ---------------------------------------------------------
+def refresh_rollups(db: Session, symbol: str, since: date = None):
+    """
+    Recompute monthly and yearly bars for `symbol` from daily_data.
+    With `since`, only the year containing it onwards is recomputed,
+    so a new daily bar touches at most one year of rows.
+    Caller is responsible for commit.
+    """
+    query = db.query(
+        DailyData.stock_id,
+        DailyData.date,
+        DailyData.open,
+        DailyData.high,
+        DailyData.low,
+        DailyData.close,
+        DailyData.volume,
+    ).filter(DailyData.symbol == symbol)
+
+    if since:
+        query = query.filter(DailyData.date >= date(since.year, 1, 1))
+
+    rows = query.order_by(DailyData.date.asc()).all()
+    if not rows:
+        return 0
+
+    stock_ids, dates, opens, highs, lows, closes, volumes = zip(*rows)
+    stock_id = stock_ids[-1]
+
+    dates = np.array(dates, dtype="datetime64[D]")
+    opens = np.array(opens, dtype=float)
+    highs = np.array(highs, dtype=float)
+    lows = np.array(lows, dtype=float)
+    closes = np.array(closes, dtype=float)
+    volumes = np.nan_to_num(np.array(volumes, dtype=float)).astype(np.int64)
+
+    months = rollup_ohlc(dates.astype("datetime64[M]"), dates, opens, highs, lows, closes, volumes)
+    years = rollup_ohlc(dates.astype("datetime64[Y]"), dates, opens, highs, lows, closes, volumes)
+
+    monthly_rows = _bar_rows(months, symbol, stock_id)
+    yearly_rows = _bar_rows(years, symbol, stock_id)
+    for r in yearly_rows:
+        r.pop("month")
+
+    bulk_upsert(db, MonthlyBar, monthly_rows, BAR_UPDATE_COLUMNS)
+    bulk_upsert(db, YearlyBar, yearly_rows, BAR_UPDATE_COLUMNS)
+    return len(monthly_rows)
@@ -0,0 +1,364 @@
+# service/screener_engine.py
+import logging
+import os
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from db.database import SessionLocal
+from model.daily_data import DailyData
+from model.stock_model import StockFundamentals
+from service.batch_indicator_service import build_price_matrix, compute_indicator_matrix
+from service.market_movers_service import quotes_version
+from service.price_store import price_store
+
+# How often (seconds) the snapshot checks whether fundamentals / bars changed.
+# Bars are written by other processes; latest_quote.updated_at moves on every
+# bar write (including rewrites of today's bar), MAX(date) only on a new day.
+SCREENER_SNAPSHOT_CHECK_SECONDS = float(os.getenv("SCREENER_SNAPSHOT_CHECK_SECONDS", 30))
+
+FUNDAMENTAL_NUMERIC = ["market_cap", "pe_ratio", "pb_ratio", "eps", "dividend_yield", "live_price"]
+FUNDAMENTAL_TEXT = ["name", "sector", "industry"]
+
+# computed field -> key in compute_indicator_matrix()
+TECHNICAL_FIELDS = {
+    "close": "close",
+    "sma_20": "SMA_20",
+    "ema_20": "EMA_20",
+    "rsi_14": "RSI_14",
+    "macd": "MACD",
+    "macd_signal": "Signal",
+    "macd_histogram": "Histogram",
+    "bb_upper": "Upper",
+    "bb_lower": "Lower",
+}
+TECHNICAL_EXTRA = ["change_1d_pct", "change_5d_pct", "change_30d_pct"]
+
+
+class ScreenerQueryError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------
+# Struct-of-arrays snapshot
+# ---------------------------------------------------------
+class FundamentalsSnapshot:
+    """
+    One array per column, one row per stock_fundamentals symbol.
+    Text columns are also kept as integer codes of their lowercased values,
+    so eq / in are case-insensitive integer compares (as under MySQL's collation).
+    """
+
+    def __init__(self, rows, technicals: dict, version):
+        self.version = version
+        self.size = len(rows)
+        self.id = np.array([r.id for r in rows], dtype=np.int64)
+        self.symbol = np.array([r.symbol for r in rows], dtype=object)
+        self.last_updated = [r.last_updated for r in rows]
+        self.index = {symbol: i for i, symbol in enumerate(self.symbol)}
+
+        self.numeric = {
+            col: np.array([getattr(r, col) for r in rows], dtype=float)
+            for col in FUNDAMENTAL_NUMERIC
+        }
+        self.numeric.update(technicals)
+
+        self.text = {}
+        self.codes = {}
+        for col in ["symbol"] + FUNDAMENTAL_TEXT:
+            values = np.array([getattr(r, col) or "" for r in rows], dtype=object)
+            folded = np.array([v.lower() for v in values], dtype=object)
+            categories, codes = np.unique(folded, return_inverse=True) if self.size else ([], np.array([], dtype=np.int64))
+            self.text[col] = values
+            self.codes[col] = ({c: i for i, c in enumerate(categories)}, codes)
+
+    @property
+    def fields(self):
+        return ["symbol"] + FUNDAMENTAL_TEXT + list(self.numeric)
+
+    def rows(self, positions, extra_fields=()):
+        """Materialise result rows as plain dicts (no ORM state)"""
+        extra = [f for f in extra_fields if f in self.numeric and f not in FUNDAMENTAL_NUMERIC]
+        out = []
+        for i in positions:
+            row = {
+                "id": int(self.id[i]),
+                "symbol": self.symbol[i],
+                **{col: (self.text[col][i] or None) for col in FUNDAMENTAL_TEXT},
+            }
+            for col in FUNDAMENTAL_NUMERIC + extra:
+                value = self.numeric[col][i]
+                row[col] = None if np.isnan(value) else float(value)
+            row["last_updated"] = self.last_updated[i]
+            out.append(row)
+        return out
+
+
+def _technical_columns(db: Session, symbols: list):
+    """Latest indicator values per symbol, aligned with `symbols`"""
+    columns = {name: np.full(len(symbols), np.nan) for name in list(TECHNICAL_FIELDS) + TECHNICAL_EXTRA}
+    close = build_price_matrix(db, symbols, limit=300) if symbols else None
+    if close is None:
+        return columns
+
+    matrix = compute_indicator_matrix(close)
+    order = {symbol: i for i, symbol in enumerate(symbols)}
+    positions = np.array([order[s] for s in close.columns])
+
+    # last valid row per symbol column, computed once from the close matrix
+    values = close.to_numpy()
+    valid = ~np.isnan(values)
+    last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    has_close = valid.any(axis=0)
+    cols = np.arange(values.shape[1])
+
+    for name, key in TECHNICAL_FIELDS.items():
+        picked = matrix[key].to_numpy()[last, cols]
+        columns[name][positions] = np.where(has_close, picked, np.nan)
+
+    for name, bars in (("change_1d_pct", 1), ("change_5d_pct", 5), ("change_30d_pct", 30)):
+        changed = close.pct_change(bars, fill_method=None).to_numpy()[last, cols] * 100
+        columns[name][positions] = np.where(has_close, changed, np.nan)
+
+    return columns
+
+
+class SnapshotHolder:
+    """
+    Keeps the current snapshot and rebuilds it when its source data changes.
+    Only the first build runs inside a request; later rebuilds load price
+    histories on a background thread while queries keep using the old snapshot.
+    """
+
+    def __init__(self, check_seconds: float = SCREENER_SNAPSHOT_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._building = False
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(old_snapshot, new_snapshot) runs after every rebuild"""
+        self._listeners.append(callback)
+
+    @staticmethod
+    def _version(db: Session):
+        count, updated = db.query(func.count(StockFundamentals.id), func.max(StockFundamentals.last_updated)).one()
+        trading_day = db.query(func.max(DailyData.date)).scalar()
+        return count, updated, trading_day, quotes_version(db)
+
+    def get(self, db: Session):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return snapshot
+            version = self._version(db)
+            if snapshot is None:
+                snapshot = self._snapshot = self._build(db, version)
+            elif snapshot.version != version:
+                self._start_rebuild(version)
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def warm(self):
+        """Build the first snapshot in the background (e.g. at startup)"""
+        with self._lock:
+            if self._snapshot is None:
+                self._start_rebuild(None)
+
+    def invalidate(self):
+        """Force a version check on the next query"""
+        self._checked_at = 0.0
+
+    def _start_rebuild(self, version):
+        # caller holds self._lock
+        if self._building:
+            return
+        self._building = True
+        threading.Thread(target=self._rebuild, args=(version,), daemon=True).start()
+
+    def _rebuild(self, version):
+        db = SessionLocal()
+        try:
+            snapshot = self._build(db, version if version is not None else self._version(db))
+            with self._lock:
+                old, self._snapshot = self._snapshot, snapshot
+            if old is not None:
+                for callback in self._listeners:
+                    try:
+                        callback(old, snapshot)
+                    except Exception as e:
+                        logging.error(f"Screener snapshot listener failed: {e}")
+        except Exception as e:
+            logging.error(f"Screener snapshot rebuild failed: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._building = False
+
+    @staticmethod
+    def _build(db: Session, version):
+        rows = db.query(
+            StockFundamentals.id, StockFundamentals.symbol, StockFundamentals.last_updated,
+            *[getattr(StockFundamentals, col) for col in FUNDAMENTAL_TEXT + FUNDAMENTAL_NUMERIC],
+        ).order_by(StockFundamentals.id).all()
+        symbols = [r.symbol for r in rows]
+        # cached series may predate the bars that changed the version
+        for symbol in symbols:
+            price_store.invalidate(symbol)
+        return FundamentalsSnapshot(rows, _technical_columns(db, symbols), version)
+
+
+screener_snapshot = SnapshotHolder()
+
+
+def diff_snapshots(old, new):
+    """
+    What changed between two snapshots:
+    (changed field names, positions in `new` of new or changed rows, symbols no longer present)
+    """
+    old_pos = np.array([old.index.get(symbol, -1) for symbol in new.symbol], dtype=np.int64)
+    present = np.flatnonzero(old_pos >= 0)
+    changed_rows = old_pos < 0
+    changed_fields = set()
+
+    for col, values in new.numeric.items():
+        a = values[present]
+        b = old.numeric[col][old_pos[present]]
+        differs = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+        if differs.any():
+            changed_fields.add(col)
+            changed_rows[present[differs]] = True
+
+    for col in FUNDAMENTAL_TEXT:
+        differs = new.text[col][present] != old.text[col][old_pos[present]]
+        if differs.any():
+            changed_fields.add(col)
+            changed_rows[present[differs]] = True
+
+    removed = set(old.index) - set(new.index)
+    return changed_fields, np.flatnonzero(changed_rows), removed
+
+
+# ---------------------------------------------------------
+# DSL -> mask compiler
+# ---------------------------------------------------------
+_NUMERIC_OPS = {
+    "gt": np.greater,
+    "gte": np.greater_equal,
+    "lt": np.less,
+    "lte": np.less_equal,
+    "eq": np.equal,
+    "ne": np.not_equal,
+}
+
+
+def _number(value, field):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ScreenerQueryError(f"{field}: expected a number, got {value!r}")
+
+
+def _compile_condition(cond, snapshot):
+    field, op, value = cond.field, cond.op, cond.value
+
+    if field in snapshot.codes:
+        lookup, codes = snapshot.codes[field]
+        if op in ("eq", "ne"):
+            code = lookup.get(str(value).lower(), -1)
+            return (lambda: codes == code) if op == "eq" else (lambda: codes != code)
+        if op in ("in", "not_in"):
+            if not isinstance(value, list):
+                raise ScreenerQueryError(f"{field}: '{op}' expects a list")
+            folded = [str(v).lower() for v in value]
+            wanted = np.array([lookup[v] for v in folded if v in lookup], dtype=codes.dtype)
+            return (lambda: np.isin(codes, wanted)) if op == "in" else (lambda: ~np.isin(codes, wanted))
+        raise ScreenerQueryError(f"{field}: '{op}' is not supported on text fields")
+
+    if field not in snapshot.numeric:
+        raise ScreenerQueryError(f"Unknown field: {field}")
+    column = snapshot.numeric[field]
+
+    if op in _NUMERIC_OPS:
+        ufunc, target = _NUMERIC_OPS[op], _number(value, field)
+        if op == "ne":
+            return lambda: ufunc(column, target) & ~np.isnan(column)
+        return lambda: ufunc(column, target)
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ScreenerQueryError(f"{field}: 'between' expects [low, high]")
+        low, high = _number(value[0], field), _number(value[1], field)
+        return lambda: (column >= low) & (column <= high)
+    if op in ("in", "not_in"):
+        if not isinstance(value, list):
+            raise ScreenerQueryError(f"{field}: '{op}' expects a list")
+        wanted = np.array([_number(v, field) for v in value])
+        return (lambda: np.isin(column, wanted)) if op == "in" else (lambda: ~np.isin(column, wanted) & ~np.isnan(column))
+    raise ScreenerQueryError(f"Unsupported operator: {op}")
+
+
+def compile_expression(node, snapshot):
+    """Turn a ScreenerExpression / ScreenerCondition tree into a zero-arg mask function"""
+    if node is None:
+        return lambda: np.ones(snapshot.size, dtype=bool)
+
+    if hasattr(node, "field"):
+        return _compile_condition(node, snapshot)
+
+    parts = []
+    if node.all:
+        children = [compile_expression(child, snapshot) for child in node.all]
+        parts.append(lambda: np.logical_and.reduce([c() for c in children]))
+    if node.any:
+        children = [compile_expression(child, snapshot) for child in node.any]
+        parts.append(lambda: np.logical_or.reduce([c() for c in children]))
+    if not parts:
+        return lambda: np.ones(snapshot.size, dtype=bool)
+    return lambda: np.logical_and.reduce([p() for p in parts])
+
+
+def referenced_fields(node):
+    if node is None:
+        return []
+    if hasattr(node, "field"):
+        return [node.field]
+    return [f for child in (node.all or []) + (node.any or []) for f in referenced_fields(child)]
+
+
+def select(snapshot, mask, sort_by: str = None, order: str = "desc", limit: int = None):
+    """Positions of matching rows, sorted (missing values last) and cut to `limit`"""
+    positions = np.flatnonzero(mask)
+    if sort_by:
+        if sort_by in snapshot.numeric:
+            keys = snapshot.numeric[sort_by][positions]
+            keys = -keys if order == "desc" else keys
+            positions = positions[np.argsort(keys, kind="stable")]  # NaN sorts last
+        elif sort_by in snapshot.text:
+            positions = positions[np.argsort(snapshot.text[sort_by][positions], kind="stable")]
+            if order == "desc":
+                positions = positions[::-1]
+        else:
+            raise ScreenerQueryError(f"Unknown sort field: {sort_by}")
+    if limit:
+        positions = positions[:limit]
+    return positions
+
+
+def run_query(db: Session, query):
+    """Evaluate a ScreenerQuery against the current snapshot"""
+    snapshot = screener_snapshot.get(db)
+    mask = compile_expression(query.where, snapshot)()
+    positions = select(snapshot, mask, query.sort_by, query.order, query.limit)
+    extra = referenced_fields(query.where) + ([query.sort_by] if query.sort_by else [])
+    return {
+        "total": int(mask.sum()),
+        "count": len(positions),
+        "data": snapshot.rows(positions, extra),
+    }
@@ -1,37 +1,203 @@
 # service/screener_service.py
-from db.database import get_db
-from model.stock_model import StockFundamentals
-from schema.stock_schema import ScreenerFilter, ScreenerAdvanced
+import json
+import threading
+import numpy as np
+from pydantic import ValidationError
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from model.stock_model import CustomScreener
+from schema.stock_schema import ScreenerAdvanced, ScreenerQuery, ScreenerCondition, ScreenerExpression, ScreenerSave
+from service.screener_engine import (
+    screener_snapshot, run_query, compile_expression, referenced_fields, select, diff_snapshots, ScreenerQueryError
+)
+
+
+def _range(field, low, high):
+    return ScreenerCondition(field=field, op="between", value=[low, high])
+
 
 # Fetch stocks with live price already updated
 def filter_stocks(db, min_price, max_price, min_pe, max_pe):
-    stocks = db.query(StockFundamentals).filter(
-        StockFundamentals.live_price >= min_price,
-        StockFundamentals.live_price <= max_price,
-        StockFundamentals.pe_ratio >= min_pe,
-        StockFundamentals.pe_ratio <= max_pe
-    ).all()
-    return [s.__dict__ for s in stocks]
+    query = ScreenerQuery(where=ScreenerExpression(all=[
+        _range("live_price", min_price, max_price),
+        _range("pe_ratio", min_pe, max_pe),
+    ]))
+    return run_query(db, query)["data"]
 
 def advanced_filter(db, filter: ScreenerAdvanced):
-    stocks = db.query(StockFundamentals).filter(
-        StockFundamentals.pe_ratio >= filter.min_pe,
-        StockFundamentals.pe_ratio <= filter.max_pe,
-        StockFundamentals.pb_ratio >= filter.min_pb,
-        StockFundamentals.pb_ratio <= filter.max_pb,
-        StockFundamentals.market_cap >= filter.min_mcap,
-        StockFundamentals.market_cap <= filter.max_mcap
-    ).all()
-    return [s.__dict__ for s in stocks]
+    query = ScreenerQuery(where=ScreenerExpression(all=[
+        _range("pe_ratio", filter.min_pe, filter.max_pe),
+        _range("pb_ratio", filter.min_pb, filter.max_pb),
+        _range("market_cap", filter.min_mcap, filter.max_mcap),
+    ]))
+    return run_query(db, query)["data"]
 
 def filter_by_sector(db, sector):
-    stocks = db.query(StockFundamentals).filter(StockFundamentals.sector == sector).all()
-    return [s.__dict__ for s in stocks]
+    query = ScreenerQuery(where=ScreenerCondition(field="sector", op="eq", value=sector))
+    return run_query(db, query)["data"]
+
+def query_screener(db, query: ScreenerQuery):
+    return run_query(db, query)
+
+def screener_fields(db):
+    snapshot = screener_snapshot.get(db)
+    return {"symbols": snapshot.size, "fields": snapshot.fields}
+
+
+# ---------------------------------------------------------
+# Saved screeners
+# ---------------------------------------------------------
+class _SavedEntry:
+    def __init__(self, screener, query, version, symbols):
+        self.id = screener.id
+        self.name = screener.name
+        self.description = screener.description
+        self.query = query
+        self.fields = set(referenced_fields(query.where))
+        self.version = version
+        self.symbols = symbols
+
+
+class SavedScreenerCache:
+    """
+    Matching symbol set of every opened saved screener.
+    When the fundamentals snapshot is rebuilt only screeners that use a
+    changed column are re-evaluated, and only for the rows that changed.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.full_evaluations = 0
+        self.incremental_updates = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _evaluate(snapshot, query):
+        mask = compile_expression(query.where, snapshot)()
+        return set(snapshot.symbol[mask])
+
+    def get(self, db, screener_id: int):
+        """(snapshot, entry) for a saved screener, or (snapshot, None) if it does not exist"""
+        snapshot = screener_snapshot.get(db)
+        with self._lock:
+            entry = self._entries.get(screener_id)
+        if entry is not None and entry.version == snapshot.version:
+            return snapshot, entry
+
+        screener = db.get(CustomScreener, screener_id)
+        if screener is None:
+            self.drop(screener_id)
+            return snapshot, None
+
+        try:
+            query = ScreenerQuery.model_validate_json(screener.filters)
+        except ValidationError as e:
+            raise ScreenerQueryError(f"Saved screener {screener_id} has an invalid query: {e}")
+        entry = _SavedEntry(screener, query, snapshot.version, self._evaluate(snapshot, query))
+        with self._lock:
+            self._entries[screener_id] = entry
+            self.full_evaluations += 1
+        return snapshot, entry
 
-def save_screener(db, filter: ScreenerFilter):
-    # Optional: save to a CustomScreener table if needed
-    pass
+    def drop(self, screener_id: int):
+        with self._lock:
+            self._entries.pop(screener_id, None)
+
+    def on_snapshot(self, old, new):
+        """Snapshot listener: carry cached result sets over to the new snapshot"""
+        changed_fields, changed_rows, removed = diff_snapshots(old, new)
+        changed_symbols = set(new.symbol[changed_rows])
+        has_new_rows = any(symbol not in old.index for symbol in changed_symbols)
+
+        with self._lock:
+            entries = list(self._entries.values())
+
+        for entry in entries:
+            if entry.version != old.version:
+                self.drop(entry.id)
+                continue
+
+            symbols = entry.symbols - removed
+            if has_new_rows or entry.fields & changed_fields:
+                mask = compile_expression(entry.query.where, new)()
+                matched = set(new.symbol[changed_rows[mask[changed_rows]]])
+                symbols = (symbols - changed_symbols) | matched
+                self.incremental_updates += 1
+            else:
+                self.skipped += 1
+
+            entry.symbols = symbols
+            entry.version = new.version
+
+
+saved_screeners = SavedScreenerCache()
+screener_snapshot.add_listener(saved_screeners.on_snapshot)
+
+
+def save_screener(db, data: ScreenerSave):
+    snapshot = screener_snapshot.get(db)
+    try:
+        compile_expression(data.query.where, snapshot)
+        sort_by = data.query.sort_by
+        if sort_by and sort_by not in snapshot.numeric and sort_by not in snapshot.text:
+            raise ScreenerQueryError(f"Unknown sort field: {sort_by}")
+    except ScreenerQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    screener = CustomScreener(
+        name=data.name,
+        description=data.description,
+        filters=data.query.model_dump_json(exclude_none=True),
+    )
+    db.add(screener)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"A screener named '{data.name}' already exists")
+    db.refresh(screener)
+
+    _, entry = saved_screeners.get(db, screener.id)
+    return {"id": screener.id, "name": screener.name, "description": screener.description, "count": len(entry.symbols)}
 
 def list_screeners(db):
-    # Optional: return saved screeners
-    return []
+    screeners = db.query(CustomScreener).order_by(CustomScreener.id).all()
+    return [
+        {
+            "id": s.id,
+            "name": s.name,
+            "description": s.description,
+            "filters": json.loads(s.filters) if s.filters else None,
+            "created_at": s.created_at,
+        }
+        for s in screeners
+    ]
+
+def open_screener(db, screener_id: int):
+    """Results of a saved screener, served from its cached symbol set"""
+    snapshot, entry = saved_screeners.get(db, screener_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Screener not found")
+
+    mask = np.zeros(snapshot.size, dtype=bool)
+    mask[[snapshot.index[s] for s in entry.symbols if s in snapshot.index]] = True
+    query = entry.query
+    positions = select(snapshot, mask, query.sort_by, query.order, query.limit)
+    return {
+        "id": entry.id,
+        "name": entry.name,
+        "description": entry.description,
+        "total": len(entry.symbols),
+        "count": len(positions),
+        "data": snapshot.rows(positions, list(entry.fields) + ([query.sort_by] if query.sort_by else [])),
+    }
+
+def delete_screener(db, screener_id: int):
+    screener = db.get(CustomScreener, screener_id)
+    if screener is None:
+        raise HTTPException(status_code=404, detail="Screener not found")
+    db.delete(screener)
+    db.commit()
+    saved_screeners.drop(screener_id)
+    return {"message": "Screener deleted", "id": screener_id}
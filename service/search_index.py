@@ -0,0 +1,214 @@
+# service/search_index.py
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from model.stock import Stock
+
+# How often (seconds) the index checks whether the stocks table changed
+SEARCH_INDEX_CHECK_SECONDS = float(os.getenv("SEARCH_INDEX_CHECK_SECONDS", 60))
+# Minimum trigram similarity for a fuzzy (typo) match
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", 0.3))
+
+# Words dropped from company names before indexing ("Tata Motors Ltd" -> "tata motors")
+NAME_STOPWORDS = {"ltd", "limited", "the", "of", "and", "co", "company", "corp", "corporation", "inc"}
+
+# Match tiers, best first
+EXACT, PREFIX, SUBSTRING, FUZZY = range(4)
+# Within a tier a symbol match beats a name match
+SYMBOL, NAME = range(2)
+
+
+def clean_name(name: str):
+    words = re.findall(r"[a-z0-9&]+", (name or "").lower())
+    return " ".join(w for w in words if w not in NAME_STOPWORDS)
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Trie:
+    """Character trie; every node lists the entries whose key passes through it"""
+
+    def __init__(self):
+        self.root = ({}, [])
+
+    def add(self, key: str, entry: int):
+        node = self.root
+        for ch in key:
+            node = node[0].setdefault(ch, ({}, []))
+            if not node[1] or node[1][-1] != entry:
+                node[1].append(entry)
+
+    def prefixed(self, prefix: str):
+        node = self.root
+        for ch in prefix:
+            node = node[0].get(ch)
+            if node is None:
+                return []
+        return node[1]
+
+
+class SearchIndex:
+    """
+    Prefix tries plus a trigram index over symbol and cleaned company name.
+    Ranking: exact > prefix > substring > fuzzy.
+    """
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.size = len(rows)
+        self.stock_id = [r.id for r in rows]
+        self.symbol = [r.symbol for r in rows]
+        self.name = [r.name or "" for r in rows]
+
+        self._symbol_key = [s.lower() for s in self.symbol]
+        self._symbol_base = [s.split(".")[0] for s in self._symbol_key]
+        self._name_key = [clean_name(n) for n in self.name]
+
+        self._exact_symbol = {}
+        self._exact_name = {}
+        self._symbol_trie = _Trie()
+        self._name_trie = _Trie()
+        self._symbol_grams = {}
+        self._name_grams = {}
+        self._fuzzy_grams = []  # per entry: trigram sets of symbol, name and each name word
+        self._fuzzy_postings = {}
+
+        for i in range(self.size):
+            symbol, base, name = self._symbol_key[i], self._symbol_base[i], self._name_key[i]
+            self._exact_symbol.setdefault(symbol, i)
+            self._exact_symbol.setdefault(base, i)
+            if name:
+                self._exact_name.setdefault(name, []).append(i)
+
+            self._symbol_trie.add(symbol, i)
+            words = name.split()
+            if name:
+                self._name_trie.add(name, i)
+            for word in words[1:]:
+                self._name_trie.add(word, i)
+
+            for gram in trigrams(symbol):
+                self._symbol_grams.setdefault(gram, set()).add(i)
+            for gram in trigrams(name):
+                self._name_grams.setdefault(gram, set()).add(i)
+
+            grams = [trigrams(f" {key} ") for key in dict.fromkeys([base, name, *words]) if key]
+            self._fuzzy_grams.append(grams)
+            for gram in set().union(*grams):
+                self._fuzzy_postings.setdefault(gram, set()).add(i)
+
+    # -----------------------------------------
+    # Matching
+    # -----------------------------------------
+    def _substring(self, query: str, grams: dict, keys: list):
+        if len(query) < 3:
+            candidates = range(self.size)
+        else:
+            postings = sorted((grams.get(g, set()) for g in trigrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+        return [i for i in candidates if query in keys[i]]
+
+    def _fuzzy(self, query: str):
+        wanted = trigrams(f" {query} ")
+        shared = Counter()
+        for gram in wanted:
+            shared.update(self._fuzzy_postings.get(gram, ()))
+        matches = []
+        for i, _ in shared.most_common(200):
+            best = max(len(wanted & g) / len(wanted | g) for g in self._fuzzy_grams[i])
+            if best >= SEARCH_FUZZY_THRESHOLD:
+                matches.append((i, best))
+        return matches
+
+    def search(self, q: str, limit: int = 20, within: set = None):
+        """
+        Top `limit` (symbol, name) pairs for `q`, best match first.
+        `within` restricts results to these stock ids.
+        """
+        query = (q or "").strip().lower()
+        name_query = clean_name(query) or query
+        if not query:
+            return []
+
+        ranks = {}
+
+        def hit(entries, tier, field, score=0.0):
+            for i in entries:
+                rank = (tier, field, -score)
+                if i not in ranks or rank < ranks[i]:
+                    ranks[i] = rank
+
+        if query in self._exact_symbol:
+            hit([self._exact_symbol[query]], EXACT, SYMBOL)
+        hit(self._exact_name.get(name_query, ()), EXACT, NAME)
+        hit(self._symbol_trie.prefixed(query), PREFIX, SYMBOL)
+        hit(self._name_trie.prefixed(name_query), PREFIX, NAME)
+        if within is not None:
+            ranks = {i: rank for i, rank in ranks.items() if self.stock_id[i] in within}
+
+        # lower tiers can't outrank a full page of exact / prefix matches
+        if len(ranks) < limit:
+            hit(self._substring(query, self._symbol_grams, self._symbol_key), SUBSTRING, SYMBOL)
+            hit(self._substring(name_query, self._name_grams, self._name_key), SUBSTRING, NAME)
+            if within is not None:
+                ranks = {i: rank for i, rank in ranks.items() if self.stock_id[i] in within}
+
+        # typo tolerance only when the literal matches don't fill the page
+        if len(ranks) < limit and len(name_query) >= 3:
+            for i, score in self._fuzzy(name_query):
+                if within is None or self.stock_id[i] in within:
+                    hit([i], FUZZY, NAME, score)
+
+        best = heapq.nsmallest(limit, ranks, key=lambda i: (ranks[i], len(self.symbol[i]), self.symbol[i]))
+        return [(self.symbol[i], self.name[i]) for i in best]
+
+
+class SearchIndexHolder:
+    """Keeps the current index and rebuilds it when the stock universe changes"""
+
+    def __init__(self, check_seconds: float = SEARCH_INDEX_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(db: Session):
+        return db.query(func.count(Stock.id), func.max(Stock.id)).one()
+
+    def get(self, db: Session):
+        index = self._index
+        if index is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return index
+
+        with self._lock:
+            index = self._index
+            if index is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return index
+            version = tuple(self._version(db))
+            if index is None or index.version != version:
+                started = time.perf_counter()
+                rows = db.query(Stock.id, Stock.symbol, Stock.name).order_by(Stock.id).all()
+                index = SearchIndex(rows, version)
+                self._index = index
+                logging.info(f"Search index built for {index.size} stocks in {time.perf_counter() - started:.3f}s")
+            self._checked_at = time.monotonic()
+            return index
+
+    def invalidate(self):
+        """Force a version check on the next search"""
+        self._checked_at = 0.0
+
+    def search(self, db: Session, q: str, limit: int = 20, within: set = None):
+        return self.get(db).search(q, limit, within)
+
+
+stock_search = SearchIndexHolder()
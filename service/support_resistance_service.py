@@ -0,0 +1,204 @@
+# service/support_resistance_service.py
+import logging
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+from db.database import SessionLocal, bulk_upsert
+from model.stock import Stock
+from model.trend_model import SupportResistance
+from service.batch_indicator_service import get_index_symbols, build_price_matrix, build_date_matrix
+
+logger = logging.getLogger(__name__)
+
+# Pivot half-widths; the first one drives support_levels / resistance_levels
+SR_WINDOWS = (10,)
+# Recent pivots reported as levels
+SR_RECENT_PIVOTS = 5
+# Pivots closer than this fraction of price fall in the same zone
+SR_CLUSTER_TOLERANCE = float(os.getenv("SR_CLUSTER_TOLERANCE", 0.01))
+# ~6 months of trading days, the same span /trend/support-resistance uses
+SR_LOOKBACK_BARS = 126
+# Columns refreshed when the same (symbol, snapshot_date) is saved again
+SR_UPDATE_COLUMNS = [
+    "current_price", "support_levels", "resistance_levels", "nearest_support", "nearest_resistance",
+    "distance_to_support_percent", "distance_to_resistance_percent", "analysis_date",
+]
+
+
+# ---------------------------------------------------------
+# Pivots
+# ---------------------------------------------------------
+def pivot_masks(low: pd.DataFrame, high: pd.DataFrame, window: int):
+    """
+    Bars whose low (high) is the min (max) of the 2*window+1 bars centred on them.
+    Works column-wise, so one call covers every symbol of a dates x symbols frame.
+    The first and last `window` bars never qualify.
+    """
+    span = 2 * window + 1
+    lowest = low.rolling(span, center=True).min()
+    highest = high.rolling(span, center=True).max()
+    return (low == lowest).to_numpy(), (high == highest).to_numpy()
+
+
+def cluster_levels(prices: np.ndarray, volumes: np.ndarray, tolerance: float = SR_CLUSTER_TOLERANCE):
+    """
+    Group sorted pivot prices into zones wherever the gap to the next pivot
+    is within `tolerance`; each zone's price is the volume-weighted mean.
+    """
+    if len(prices) == 0:
+        return []
+
+    order = np.argsort(prices)
+    p = prices[order]
+    v = volumes[order]
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(p) > p[:-1] * tolerance) + 1))
+    touches = np.diff(np.append(starts, len(p)))
+    volume = np.add.reduceat(v, starts)
+    weighted = np.add.reduceat(p * v, starts) / np.where(volume > 0, volume, 1)
+    plain = np.add.reduceat(p, starts) / touches
+    level = np.where(volume > 0, weighted, plain)
+
+    return [
+        {"price": round(float(price), 2), "touches": int(count), "volume": int(vol)}
+        for price, count, vol in zip(level, touches, volume)
+    ]
+
+
+# ---------------------------------------------------------
+# Levels for every column of aligned OHLCV frames
+# ---------------------------------------------------------
+def compute_levels(low: pd.DataFrame, high: pd.DataFrame, close: pd.DataFrame, volume: pd.DataFrame,
+                   windows=SR_WINDOWS, tolerance: float = SR_CLUSTER_TOLERANCE, dates: np.ndarray = None):
+    """
+    Support / resistance for every symbol column in one pass.
+    `dates` is the build_date_matrix() array for position-stacked frames;
+    without it the frames' DatetimeIndex is used.
+    Returns {symbol: data} in the find_support_resistance_levels shape.
+    """
+    windows = list(dict.fromkeys(windows))
+    masks = {w: pivot_masks(low, high, w) for w in windows}
+    primary_support, primary_resistance = masks[windows[0]]
+    any_support = np.logical_or.reduce([m[0] for m in masks.values()])
+    any_resistance = np.logical_or.reduce([m[1] for m in masks.values()])
+
+    lows = low.to_numpy(dtype=float)
+    highs = high.to_numpy(dtype=float)
+    closes = close.to_numpy(dtype=float)
+    if dates is None:
+        dates = np.repeat(low.index.values.astype("datetime64[D]")[:, None], low.shape[1], axis=1)
+    volumes = np.nan_to_num(volume.to_numpy(dtype=float))
+    analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    result = {}
+    for col, symbol in enumerate(low.columns):
+        valid_rows = np.flatnonzero(~np.isnan(closes[:, col]))
+        if len(valid_rows) == 0:
+            continue
+        current_price = float(closes[valid_rows[-1], col])
+
+        recent_support = lows[primary_support[:, col], col][-SR_RECENT_PIVOTS:]
+        recent_resistance = highs[primary_resistance[:, col], col][-SR_RECENT_PIVOTS:]
+        support_levels = sorted({round(float(x), 2) for x in recent_support})
+        resistance_levels = sorted({round(float(x), 2) for x in recent_resistance})
+
+        nearest_support = max([x for x in support_levels if x < current_price], default=None)
+        nearest_resistance = min([x for x in resistance_levels if x > current_price], default=None)
+
+        s_mask = any_support[:, col]
+        r_mask = any_resistance[:, col]
+
+        result[symbol] = {
+            "current_price": round(current_price, 2),
+            "support_levels": support_levels,
+            "resistance_levels": resistance_levels,
+            "nearest_support": nearest_support,
+            "nearest_resistance": nearest_resistance,
+            "distance_to_support_percent": round(((current_price - nearest_support) / current_price * 100), 2) if nearest_support else None,
+            "distance_to_resistance_percent": round(((nearest_resistance - current_price) / current_price * 100), 2) if nearest_resistance else None,
+            "support_zones": cluster_levels(lows[s_mask, col], volumes[s_mask, col], tolerance),
+            "resistance_zones": cluster_levels(highs[r_mask, col], volumes[r_mask, col], tolerance),
+            "windows": list(windows),
+            "as_of": str(dates[valid_rows[-1], col]),
+            "analysis_date": analysis_date,
+        }
+
+    return result
+
+
+def levels_for_frame(df: pd.DataFrame, windows=SR_WINDOWS, tolerance: float = SR_CLUSTER_TOLERANCE):
+    """Levels for one OHLCV frame with Ticker.history() column names"""
+    frames = [df[[col]].rename(columns={col: "symbol"}) for col in ("Low", "High", "Close", "Volume")]
+    return compute_levels(*frames, windows=windows, tolerance=tolerance)["symbol"]
+
+
+# ---------------------------------------------------------
+# Whole-index / universe batch
+# ---------------------------------------------------------
+def batch_levels(db: Session, symbols: list, windows=SR_WINDOWS, limit: int = SR_LOOKBACK_BARS):
+    """{symbol: levels} for many symbols from position-stacked price matrices"""
+    low = build_price_matrix(db, symbols, limit, field="low")
+    if low is None:
+        return {}
+    high = build_price_matrix(db, symbols, limit, field="high")
+    close = build_price_matrix(db, symbols, limit, field="close")
+    volume = build_price_matrix(db, symbols, limit, field="volume")
+    dates = build_date_matrix(db, symbols, limit)
+    return compute_levels(low, high, close, volume, windows=windows, dates=dates)
+
+
+def index_support_resistance(db: Session, index_name: str, windows=SR_WINDOWS):
+    """Levels for every constituent of an index, or None"""
+    symbols = get_index_symbols(db, index_name)
+    levels = batch_levels(db, symbols, windows) if symbols else {}
+    if not levels:
+        return None
+    return {
+        "index": index_name,
+        "count": len(levels),
+        "data": [{"symbol": symbol, **levels[symbol]} for symbol in symbols if symbol in levels],
+    }
+
+
+def precompute_support_resistance(index_name: str = None, windows=SR_WINDOWS):
+    """
+    Nightly job: compute levels for an index (or every stored stock) and
+    upsert each symbol's support_resistance snapshot for its last trading day.
+    """
+    db = SessionLocal()
+    try:
+        if index_name:
+            symbols = get_index_symbols(db, index_name)
+        else:
+            symbols = [s for (s,) in db.query(Stock.symbol).all()]
+
+        levels = batch_levels(db, symbols, windows)
+        now = datetime.now()
+        rows = [
+            {
+                "symbol": symbol,
+                "snapshot_date": datetime.strptime(data["as_of"], "%Y-%m-%d").date(),
+                "current_price": data["current_price"],
+                "support_levels": data["support_levels"],
+                "resistance_levels": data["resistance_levels"],
+                "nearest_support": data["nearest_support"],
+                "nearest_resistance": data["nearest_resistance"],
+                "distance_to_support_percent": data["distance_to_support_percent"],
+                "distance_to_resistance_percent": data["distance_to_resistance_percent"],
+                "analysis_date": now,
+                "created_at": now,
+            }
+            for symbol, data in levels.items()
+        ]
+        bulk_upsert(db, SupportResistance, rows, SR_UPDATE_COLUMNS)
+        db.commit()
+        logger.info(f"Support/resistance stored for {len(levels)}/{len(symbols)} symbols")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    precompute_support_resistance()
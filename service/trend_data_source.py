@@ -0,0 +1,80 @@
+# service/trend_data_source.py
+import os
+from datetime import datetime, timedelta
+import pandas as pd
+import yfinance as yf
+from sqlalchemy.orm import Session
+from service.price_store import price_store
+
+# yfinance period strings -> calendar days, for the local source
+PERIOD_DAYS = {
+    "5d": 7,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+}
+
+
+class LocalDataSource:
+    """daily_data bars, served through the in-memory price store"""
+
+    name = "local"
+
+    def load(self, db: Session, symbol: str, period: str):
+        if db is None or period not in PERIOD_DAYS:
+            return None
+
+        series = price_store.get(db, symbol)
+        if series is None:
+            return None
+
+        bars = series.since(datetime.now().date() - timedelta(days=PERIOD_DAYS[period]))
+        if len(bars) == 0:
+            return None
+
+        # Same shape as Ticker.history(): capitalised columns, DatetimeIndex
+        return pd.DataFrame(
+            {
+                "Open": bars.open,
+                "High": bars.high,
+                "Low": bars.low,
+                "Close": bars.close,
+                "Volume": bars.volume,
+            },
+            index=pd.DatetimeIndex(bars.date, name="Date"),
+        )
+
+
+class YahooDataSource:
+    """Live Yahoo Finance history; used for symbols we do not store"""
+
+    name = "yahoo"
+
+    def load(self, db: Session, symbol: str, period: str):
+        df = yf.Ticker(symbol).history(period=period)
+        return None if df.empty else df
+
+
+_SOURCES = {
+    LocalDataSource.name: LocalDataSource(),
+    YahooDataSource.name: YahooDataSource(),
+}
+
+# Tried in order; set TREND_DATA_SOURCES=local to run without network access
+TREND_DATA_SOURCES = [
+    _SOURCES[name.strip()]
+    for name in os.getenv("TREND_DATA_SOURCES", "local,yahoo").split(",")
+    if name.strip() in _SOURCES
+]
+
+
+def load_ohlcv(db: Session, symbol: str, period: str):
+    """OHLCV frame from the first source that has the symbol, or None"""
+    for source in TREND_DATA_SOURCES:
+        df = source.load(db, symbol, period)
+        if df is not None:
+            return df
+    return None
@@ -0,0 +1,131 @@
+# service/trend_retention.py
+import logging
+import os
+from datetime import date, timedelta
+from sqlalchemy import inspect, text
+from db.database import SessionLocal, engine
+from model.trend_model import TrendAnalysis, SupportResistance, CandlestickPattern
+
+logger = logging.getLogger(__name__)
+
+# Snapshots older than this many days are deleted by compact_trend_tables()
+TREND_RETENTION_DAYS = int(os.getenv("TREND_RETENTION_DAYS", 365))
+PATTERN_RETENTION_DAYS = int(os.getenv("PATTERN_RETENTION_DAYS", 730))
+
+# table -> (unique key name, key columns, date column used for retention)
+SNAPSHOT_TABLES = {
+    TrendAnalysis.__tablename__: ("uq_trend_analysis_symbol_date", ["symbol", "snapshot_date"], "snapshot_date"),
+    SupportResistance.__tablename__: ("uq_support_resistance_symbol_date", ["symbol", "snapshot_date"], "snapshot_date"),
+    CandlestickPattern.__tablename__: (
+        "uq_candlestick_patterns_symbol_date_pattern", ["symbol", "pattern_date", "pattern"], "pattern_date",
+    ),
+}
+
+
+def _dedupe(db, table: str, key_columns: list):
+    """
+    Keep only the newest row (highest id) per key: one GROUP BY pass, with the
+    kept ids materialised in a derived table (MySQL can't read the table it deletes from).
+    """
+    key = ", ".join(key_columns)
+    result = db.execute(text(
+        f"DELETE FROM {table} WHERE id NOT IN ("
+        f"SELECT id FROM (SELECT MAX(id) AS id FROM {table} GROUP BY {key}) AS keep)"
+    ))
+    return result.rowcount
+
+
+def _pending_migrations(inspector):
+    """Snapshot tables that still lack their unique key"""
+    existing_tables = set(inspector.get_table_names())
+    pending = []
+    for table, (key_name, _, _) in SNAPSHOT_TABLES.items():
+        if table not in existing_tables:
+            continue
+        keys = {uc["name"] for uc in inspector.get_unique_constraints(table)}
+        keys |= {ix["name"] for ix in inspector.get_indexes(table) if ix.get("unique")}
+        if key_name not in keys:
+            pending.append(table)
+    return pending
+
+
+def check_trend_schema():
+    """Startup check only: report tables that still need ensure_trend_schema()"""
+    pending = _pending_migrations(inspect(engine))
+    if pending:
+        logger.warning(
+            f"Trend snapshot tables need migrating ({', '.join(pending)}): "
+            f"run python -m service.trend_retention"
+        )
+    return pending
+
+
+def ensure_trend_schema():
+    """
+    Bring tables created before snapshots existed up to date: add, backfill
+    and enforce NOT NULL on snapshot_date, collapse duplicates, then add the
+    unique keys. No-op once the keys exist. Run from this script, not at startup:
+    the backfill and dedupe scan whole tables.
+    """
+    inspector = inspect(engine)
+
+    db = SessionLocal()
+    try:
+        for table in _pending_migrations(inspector):
+            key_name, key_columns, _ = SNAPSHOT_TABLES[table]
+            columns = {c["name"]: c for c in inspector.get_columns(table)}
+            if "snapshot_date" in key_columns:
+                if "snapshot_date" not in columns:
+                    db.execute(text(f"ALTER TABLE {table} ADD COLUMN snapshot_date DATE NULL AFTER symbol"))
+                db.execute(text(
+                    f"UPDATE {table} SET snapshot_date = DATE(COALESCE(analysis_date, created_at)) "
+                    f"WHERE snapshot_date IS NULL"
+                ))
+                # rows with no date at all can't be placed in any snapshot
+                undated = db.execute(text(f"DELETE FROM {table} WHERE snapshot_date IS NULL")).rowcount
+                if undated:
+                    logger.info(f"{table}: removed {undated} rows without any date")
+                db.execute(text(f"ALTER TABLE {table} MODIFY snapshot_date DATE NOT NULL"))
+
+            removed = _dedupe(db, table, key_columns)
+            db.execute(text(f"CREATE UNIQUE INDEX {key_name} ON {table} ({', '.join(key_columns)})"))
+            db.commit()
+            logger.info(f"{table}: removed {removed} duplicate rows, added {key_name}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def compact_trend_tables(trend_retention_days: int = TREND_RETENTION_DAYS,
+                         pattern_retention_days: int = PATTERN_RETENTION_DAYS):
+    """
+    Maintenance job: make sure the snapshot keys exist, collapse any
+    duplicates and delete snapshots past their retention period.
+    """
+    ensure_trend_schema()
+
+    retention = {
+        TrendAnalysis.__tablename__: trend_retention_days,
+        SupportResistance.__tablename__: trend_retention_days,
+        CandlestickPattern.__tablename__: pattern_retention_days,
+    }
+
+    db = SessionLocal()
+    try:
+        for table, (_, key_columns, date_column) in SNAPSHOT_TABLES.items():
+            removed = _dedupe(db, table, key_columns)
+            cutoff = date.today() - timedelta(days=retention[table])
+            expired = db.execute(
+                text(f"DELETE FROM {table} WHERE {date_column} < :cutoff"), {"cutoff": cutoff}
+            ).rowcount
+            db.commit()
+            logger.info(f"{table}: {removed} duplicates and {expired} rows older than {cutoff} removed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    compact_trend_tables()
@@ -1,79 +1,151 @@
 # service/update_fundamentals_live.py
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import yfinance as yf
-from db.database import get_db
-from model.stock_model import StockFundamentals
 from sqlalchemy.orm import Session
-from datetime import datetime
-import time
+from db.database import SessionLocal, bulk_upsert
+from model.stock import Stock
+from model.stock_model import StockFundamentals
+from service.screener_engine import screener_snapshot
 
-SYMBOLS = [
-    "RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
-    "HINDUNILVR.NS", "KOTAKBANK.NS", "SBIN.NS", "ITC.NS", "LT.NS"
-    # Add more NSE symbols if needed
+# Upstream budget: sustained requests/second and burst size
+FUNDAMENTALS_RATE = float(os.getenv("FUNDAMENTALS_RATE", 5))
+FUNDAMENTALS_BURST = int(os.getenv("FUNDAMENTALS_BURST", 10))
+# Concurrent .info fetches and symbols per bulk upsert
+FUNDAMENTALS_WORKERS = int(os.getenv("FUNDAMENTALS_WORKERS", 8))
+FUNDAMENTALS_BATCH_SIZE = int(os.getenv("FUNDAMENTALS_BATCH_SIZE", 50))
+FUNDAMENTALS_RETRIES = int(os.getenv("FUNDAMENTALS_RETRIES", 3))
+# Pause between full refreshes when run as a script
+FUNDAMENTALS_INTERVAL_SECONDS = int(os.getenv("FUNDAMENTALS_INTERVAL_SECONDS", 300))
+
+FUNDAMENTALS_UPDATE_COLUMNS = [
+    "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio",
+    "eps", "dividend_yield", "live_price", "last_updated",
 ]
 
-def update_fundamentals_live(db: Session):
-    for symbol in SYMBOLS:
-        try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
-
-            # Fetch fundamentals
-            pe_ratio = info.get("trailingPE")
-            pb_ratio = info.get("priceToBook")
-            market_cap = info.get("marketCap")
-            sector = info.get("sector")
-            industry = info.get("industry")
-            name = info.get("shortName")
-
-            # Safe fetching of live price
-            live_price = None
-            for key in ["regularMarketPrice", "previousClose", "open"]:
-                val = info.get(key)
-                if val is not None:
-                    live_price = val
-                    break
-            if live_price is None:
-                live_price = 0.0
-
-            existing = db.query(StockFundamentals).filter(StockFundamentals.symbol == symbol).first()
-
-            if existing:
-                existing.pe_ratio = pe_ratio
-                existing.pb_ratio = pb_ratio
-                existing.market_cap = market_cap
-                existing.sector = sector
-                existing.industry = industry
-                existing.name = name
-                existing.live_price = live_price
-                existing.last_updated = datetime.utcnow()
-            else:
-                new_stock = StockFundamentals(
-                    symbol=symbol,
-                    name=name,
-                    sector=sector,
-                    industry=industry,
-                    pe_ratio=pe_ratio,
-                    pb_ratio=pb_ratio,
-                    market_cap=market_cap,
-                    live_price=live_price,
-                    last_updated=datetime.utcnow()
-                )
-                db.add(new_stock)
-
-            db.commit()
-            print(f"Updated {symbol}: live_price={live_price}")
-
-            # Optional: short sleep to avoid hitting Yahoo servers too fast
-            time.sleep(1)
 
+class TokenBucket:
+    """
+    Token bucket shared by all fetch threads, with adaptive backoff:
+    every upstream error halves the refill rate, every success
+    recovers it a little, up to the configured rate.
+    """
+
+    def __init__(self, rate: float = FUNDAMENTALS_RATE, burst: int = FUNDAMENTALS_BURST):
+        self.max_rate = rate
+        self.min_rate = rate / 16
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def failure(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+
+def _live_price(info: dict):
+    # Safe fetching of live price
+    for key in ["regularMarketPrice", "previousClose", "open"]:
+        val = info.get(key)
+        if val is not None:
+            return val
+    return 0.0
+
+
+def fetch_fundamentals(symbol: str, name: str, bucket: TokenBucket):
+    """One stock_fundamentals row from Ticker.info, or None after retries"""
+    for attempt in range(FUNDAMENTALS_RETRIES + 1):
+        bucket.acquire()
+        try:
+            info = yf.Ticker(symbol).info
+            bucket.success()
+            return {
+                "symbol": symbol,
+                "name": info.get("shortName") or name,
+                "sector": info.get("sector"),
+                "industry": info.get("industry"),
+                "market_cap": info.get("marketCap"),
+                "pe_ratio": info.get("trailingPE"),
+                "pb_ratio": info.get("priceToBook"),
+                "eps": info.get("trailingEps"),
+                "dividend_yield": info.get("dividendYield"),
+                "live_price": _live_price(info),
+                "last_updated": datetime.utcnow(),
+            }
         except Exception as e:
-            print(f"Error updating {symbol}: {e}")
-            db.rollback()
+            bucket.failure()
+            if attempt == FUNDAMENTALS_RETRIES:
+                print(f"Error updating {symbol}: {e}")
+                return None
+            # exponential backoff with jitter before retrying this symbol
+            time.sleep(min(30, 2 ** attempt) * (0.5 + random.random()))
+
+
+def update_fundamentals_live(db: Session, symbols: list = None):
+    """
+    Refresh stock_fundamentals for every active stock (or `symbols`):
+    rate-limited concurrent fetches, one bulk upsert per batch.
+    """
+    query = db.query(Stock.symbol, Stock.name).filter(Stock.is_active.isnot(False))
+    if symbols:
+        query = query.filter(Stock.symbol.in_(symbols))
+    stocks = query.order_by(Stock.symbol).all()
+
+    bucket = TokenBucket()
+    started = time.monotonic()
+    updated = 0
+
+    with ThreadPoolExecutor(max_workers=FUNDAMENTALS_WORKERS) as pool:
+        for start in range(0, len(stocks), FUNDAMENTALS_BATCH_SIZE):
+            batch = stocks[start:start + FUNDAMENTALS_BATCH_SIZE]
+            rows = [
+                row for row in pool.map(lambda s: fetch_fundamentals(s.symbol, s.name, bucket), batch)
+                if row is not None
+            ]
+            try:
+                bulk_upsert(db, StockFundamentals, rows, FUNDAMENTALS_UPDATE_COLUMNS)
+                db.commit()
+                updated += len(rows)
+            except Exception as e:
+                print(f"Error saving batch starting {batch[0].symbol}: {e}")
+                db.rollback()
+            print(f"Updated {updated}/{len(stocks)} symbols ({bucket.rate:.1f} req/s)")
+
+    # Saved screeners pick up the new values on their next read
+    screener_snapshot.invalidate()
+    print(f"Fundamentals refresh finished in {time.monotonic() - started:.0f}s")
+    return updated
+
 
 if __name__ == "__main__":
-    db = next(get_db())
     while True:
-        update_fundamentals_live(db)
-        print("Sleeping 5 minutes before next update...")
-        time.sleep(300)  # Update every 5 minutes
+        db = SessionLocal()
+        try:
+            update_fundamentals_live(db)
+        finally:
+            db.close()
+        print(f"Sleeping {FUNDAMENTALS_INTERVAL_SECONDS}s before next update...")
+        time.sleep(FUNDAMENTALS_INTERVAL_SECONDS)
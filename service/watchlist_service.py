@@ -4,6 +4,8 @@ from typing import List
 
 from model.watchlist_model import Watchlist
 from schema.watchlist_schema import WatchlistCreate, WatchlistUpdate,WatchlistListsResponse
+from service.live_stock_service import get_live_yf_prices
+from service.latest_quote_service import get_latest_quotes
 
 class WatchlistService:
     
@@ -185,5 +187,73 @@ class WatchlistService:
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Error removing symbol: {str(e)}")
-    
-    
+
+    @staticmethod
+    def _quotes_for_symbols(symbols: List[str], db: Session):
+        """
+        One compact quote per distinct symbol: live prices from a single
+        batched lookup, falling back to the last stored close.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols if s))
+        live = get_live_yf_prices(symbols) if symbols else {}
+        missing = [s for s in symbols if s not in live]
+        stored = get_latest_quotes(db, missing) if missing else {}
+
+        quotes = []
+        for symbol in symbols:
+            if symbol in live:
+                q = live[symbol]
+                price, previous, volume, timestamp, source = (
+                    q["price"], q.get("previousClose"), q.get("volume"), q.get("timestamp"), "live"
+                )
+            elif symbol in stored:
+                q = stored[symbol]
+                price, previous, volume, timestamp, source = (
+                    q.last_close, q.prev_close, None, q.last_date.isoformat(), "eod"
+                )
+            else:
+                quotes.append({"symbol": symbol, "source": "none"})
+                continue
+
+            change = price - previous if previous else None
+            quotes.append({
+                "symbol": symbol,
+                "price": price,
+                "previousClose": previous,
+                "change": round(change, 2) if change is not None else None,
+                "changePercent": round(change / previous * 100, 2) if change is not None else None,
+                "volume": volume,
+                "timestamp": timestamp,
+                "source": source,
+            })
+        return quotes
+
+    @staticmethod
+    def get_watchlist_quotes(watchlist_id: int, db: Session):
+        """Quotes for every symbol of one watchlist"""
+        watchlist = WatchlistService.get_watchlist_by_id(watchlist_id, db)
+        try:
+            return {
+                "id": watchlist.id,
+                "watchlist_name": watchlist.watchlist_name,
+                "quotes": WatchlistService._quotes_for_symbols(watchlist.symbol or [], db),
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching watchlist quotes: {str(e)}")
+
+    @staticmethod
+    def get_user_watchlist_quotes(email: str, db: Session):
+        """Quotes for all of a user's watchlists, each symbol fetched once"""
+        watchlists = WatchlistService.get_user_all_watchlists_detail(email, db)
+        try:
+            symbols = [s for w in watchlists for s in (w.symbol or [])]
+            return {
+                "email": email,
+                "watchlists": [
+                    {"id": w.id, "watchlist_name": w.watchlist_name, "symbol": w.symbol or []}
+                    for w in watchlists
+                ],
+                "quotes": WatchlistService._quotes_for_symbols(symbols, db),
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching watchlist quotes: {str(e)}")
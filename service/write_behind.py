@@ -0,0 +1,172 @@
+# service/write_behind.py
+import atexit
+import logging
+import os
+import threading
+import time
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from db.database import SessionLocal, bulk_upsert
+
+# Flush when this many rows are queued, or this many seconds after the
+# oldest queued row, whichever comes first.
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("WRITE_BEHIND_MAX_ROWS", 500))
+WRITE_BEHIND_MAX_SECONDS = float(os.getenv("WRITE_BEHIND_MAX_SECONDS", 5))
+# A row that keeps failing is retried this many times, then dropped
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", 3))
+
+
+class WriteBehindQueue:
+    """
+    Collects rows and writes them in bulk from a background thread, so
+    request handlers never wait on a commit. Rows queued with
+    `update_columns` are upserted on the table's unique key.
+    """
+
+    def __init__(self, max_rows: int = WRITE_BEHIND_MAX_ROWS, max_seconds: float = WRITE_BEHIND_MAX_SECONDS,
+                 max_retries: int = WRITE_BEHIND_MAX_RETRIES):
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.max_retries = max_retries
+        self._pending = {}  # (model, update_columns) -> [row dicts]
+        self._retry = {}  # (model, update_columns) -> [(row dict, failed attempts)]
+        self._count = 0
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.errors = 0
+        self.dropped = 0
+
+    def put(self, model, rows: list, update_columns: list = None):
+        """Queue rows (dicts of column values) for `model`'s table"""
+        if not rows:
+            return
+        key = (model, tuple(update_columns) if update_columns else None)
+        with self._lock:
+            self._pending.setdefault(key, []).extend(rows)
+            self._count += len(rows)
+            self.enqueued += len(rows)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = self._count >= self.max_rows
+            self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Write everything queued so far; returns the number of rows written.
+        Each (model, update_columns) group commits on its own. A group that
+        fails is split in halves until the failing rows are isolated; only
+        those are retried (apart from newly queued rows), up to max_retries
+        times each.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                retry, self._retry = self._retry, {}
+                self._count = 0
+                self._oldest = None
+            if not pending and not retry:
+                return 0
+
+            written = 0
+            db = SessionLocal()
+            try:
+                for key in dict.fromkeys([*retry, *pending]):
+                    # retried rows first, to keep write order
+                    if key in retry:
+                        written += self._write(db, key, retry[key])
+                    if key in pending:
+                        written += self._write(db, key, [(row, 0) for row in pending[key]])
+            finally:
+                db.close()
+
+            with self._lock:
+                self.written += written
+                self.flushes += 1
+            return written
+
+    def _write(self, db, key, batch):
+        model, update_columns = key
+        rows = [row for row, _ in batch]
+        try:
+            if update_columns:
+                bulk_upsert(db, model, rows, list(update_columns))
+            else:
+                db.execute(insert(model), rows)
+            db.commit()
+            return len(rows)
+        except OperationalError as e:
+            # connection / lock trouble, not the rows: retry the batch as is
+            db.rollback()
+            self._failed(key, batch, e)
+            return 0
+        except Exception as e:
+            db.rollback()
+            if len(batch) == 1:
+                self._failed(key, batch, e)
+                return 0
+            mid = len(batch) // 2
+            return self._write(db, key, batch[:mid]) + self._write(db, key, batch[mid:])
+
+    def _failed(self, key, batch, error):
+        table = key[0].__tablename__
+        retry = [(row, attempts + 1) for row, attempts in batch if attempts < self.max_retries]
+        dropped = len(batch) - len(retry)
+        with self._lock:
+            self.errors += 1
+            self.dropped += dropped
+            if retry:
+                self._retry.setdefault(key, []).extend(retry)
+                self._count += len(retry)
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+        if dropped:
+            logging.error(f"Write-behind dropped {dropped} {table} rows after {self.max_retries + 1} attempts: {error}")
+        if retry:
+            logging.error(f"Write-behind write of {len(retry)} {table} rows failed, will retry: {error}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._count,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "max_rows": self.max_rows,
+                "max_seconds": self.max_seconds,
+            }
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                timeout = self.max_seconds
+                if self._oldest is not None:
+                    timeout = max(self.max_seconds - (time.monotonic() - self._oldest), 0)
+            self._wake.wait(timeout)
+            self._wake.clear()
+            with self._lock:
+                due = self._count >= self.max_rows or (
+                    self._oldest is not None and time.monotonic() - self._oldest >= self.max_seconds
+                )
+            if due:
+                self.flush()
+
+
+analysis_writer = WriteBehindQueue()
+# Don't lose queued rows on a clean shutdown
+atexit.register(analysis_writer.flush)
@@ -0,0 +1,49 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+import pandas as pd
+
+import service.batch_indicator_service as batch
+from service.analysis_service import calculate_all_indicators
+from service.price_store import _build_series
+
+
+class _Store:
+    def __init__(self, series):
+        self.series = series
+
+    def get_many(self, db, symbols):
+        return {s: self.series[s] for s in symbols if s in self.series}
+
+
+def _series(symbol, dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    rows = [(1, d, c * 0.99, c * 1.01, c * 0.98, c, 1000 + i) for i, (d, c) in enumerate(zip(dates, close))]
+    return _build_series(symbol, rows)
+
+
+def test_symbol_with_missing_session_uses_its_own_bars(monkeypatch):
+    days = list(pd.bdate_range("2024-01-01", "2024-03-22").date)
+    gap = days[-6]  # one session BBB did not trade
+    store = _Store({
+        "AAA.NS": _series("AAA.NS", days, 1),
+        "BBB.NS": _series("BBB.NS", [d for d in days if d != gap], 2),
+    })
+    monkeypatch.setattr(batch, "price_store", store)
+
+    close = batch.build_price_matrix(None, ["AAA.NS", "BBB.NS"])
+    dates = batch.build_date_matrix(None, ["AAA.NS", "BBB.NS"])
+    latest = batch.latest_values(batch.compute_indicator_matrix(close), dates)
+
+    own = store.series["BBB.NS"].to_frame()
+    expected = calculate_all_indicators(own)
+    got = batch.format_indicator_snapshot(latest["BBB.NS"])
+
+    assert got["SMA_20"]["date"] == "2024-03-22"
+    for key, field in [("SMA_20", "SMA"), ("EMA_20", "EMA"), ("RSI_14", "RSI"), ("MACD", "MACD")]:
+        assert got[key]["date"] == expected[key]["date"]
+        assert np.isclose(got[key][field], expected[key][field])
+    assert np.isclose(got["SMA_20"]["close"], own["close"].iloc[-1])
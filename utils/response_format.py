@@ -0,0 +1,90 @@
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+import numpy as np
+
+# Alternative encodings for time-series endpoints. The default ("json")
+# stays the usual list of per-row objects.
+FORMATS = {
+    "columnar": "application/vnd.columnar+json",
+    "msgpack": "application/x-msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def negotiate_format(request: Request, format: str = None) -> str:
+    """`?format=` wins, then the Accept header, else plain JSON records"""
+    if format:
+        if format != "json" and format not in FORMATS:
+            raise HTTPException(status_code=406, detail=f"Unsupported format: {format}")
+        return format
+
+    accept = request.headers.get("accept", "")
+    for name, media_type in FORMATS.items():
+        if media_type in accept:
+            return name
+    return "json"
+
+
+def records_to_columns(records: list, fields: list = None) -> dict:
+    """[{a: 1, b: 2}, ...] -> {a: [1, ...], b: [2, ...]}"""
+    if fields is None:
+        fields = list(records[0].keys()) if records else []
+    return {field: [r.get(field) for r in records] for field in fields}
+
+
+def _to_list(values):
+    """Column -> JSON/msgpack friendly list (dates as ISO strings, NaN as None)"""
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "M":
+            return values.astype(str).tolist()
+        if values.dtype.kind == "f":
+            return np.where(np.isnan(values), None, values).tolist()
+        return values.tolist()
+    return [None if isinstance(v, float) and v != v else v for v in values]
+
+
+def _to_arrow(values):
+    import pyarrow as pa
+
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == "f":
+            # Wraps the NumPy buffer; NaN becomes null via the mask
+            return pa.array(values, mask=np.isnan(values))
+        return pa.array(values)
+    return pa.array(_to_list(values))
+
+
+def columnar_response(columns: dict, fmt: str, meta: dict = None) -> Response:
+    """
+    Encode {field: column} as columnar JSON, MessagePack or Arrow IPC.
+    `meta` holds scalar fields shared by every row (e.g. symbol).
+    """
+    meta = meta or {}
+
+    if fmt == "columnar":
+        body = {**meta, **{name: _to_list(values) for name, values in columns.items()}}
+        return JSONResponse(body, media_type=FORMATS["columnar"])
+
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=406, detail="MessagePack is not available on this server")
+        body = {**meta, **{name: _to_list(values) for name, values in columns.items()}}
+        return Response(msgpack.packb(body), media_type=FORMATS["msgpack"])
+
+    if fmt == "arrow":
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow is not available on this server")
+        table = pa.table(
+            {name: _to_arrow(values) for name, values in columns.items()},
+            metadata={key: str(value) for key, value in meta.items()},
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), media_type=FORMATS["arrow"])
+
+    raise HTTPException(status_code=406, detail=f"Unsupported format: {fmt}")